@@ -15,7 +15,6 @@ from src.agent.nodes.reflect import reflect_node, should_refine
 from src.agent.nodes.consolidate import consolidate_node
 from src.agent.nodes.summarize import summarize_node
 from src.agent.multi_hop import multi_hop_node
-from src.config import config
 
 
 def should_multi_hop(state: AgentState) -> str:
@@ -79,14 +78,27 @@ def build_graph() -> StateGraph:
     return graph
 
 
+# Compiled graph shared by runs without a checkpointer (nodes hold no per-run state)
+_default_app = None
+
+
 def compile_graph(checkpointer: Any = None):
     """
     Compile the graph for execution.
 
+    Without a checkpointer the compiled graph is built once and reused,
+    since compilation is pure overhead on every query.
+
     Args:
         checkpointer: Optional checkpointer for state persistence.
                       If None and CHECKPOINT_ENABLED, uses MemorySaver.
     """
+    global _default_app
+    if checkpointer is None:
+        if _default_app is None:
+            _default_app = build_graph().compile()
+        return _default_app
+
     graph = build_graph()
     return graph.compile(checkpointer=checkpointer)
 
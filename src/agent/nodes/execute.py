@@ -8,7 +8,7 @@ from typing import Any
 from src.agent.state import AgentState
 from src.tools import ICD10Tool, LOINCTool, RxTermsTool, HCPCSTool, UCUMTool, HPOTool
 from src.tools.base import ClinicalTablesClient, CodeResult, APIError
-from src.services.cache import APIResponseCache
+from src.services.cache import APIResponseCache, create_cache_backend
 from src.services.http import HTTPClientManager
 from src.config import config
 
@@ -25,7 +25,10 @@ def _get_shared_client() -> ClinicalTablesClient:
     global _cache, _http_manager
 
     if config.CACHE_ENABLED and _cache is None:
-        _cache = APIResponseCache(default_ttl=config.CACHE_TTL)
+        _cache = APIResponseCache(
+            backend=create_cache_backend(),
+            default_ttl=config.CACHE_TTL,
+        )
         logger.info("API response caching enabled")
 
     if _http_manager is None:
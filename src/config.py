@@ -1,69 +1,77 @@
 # ABOUTME: Configuration management for Clinical Codes Finder.
 # ABOUTME: Loads settings from environment variables with sensible defaults.
 
-import os
 from dotenv import load_dotenv
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Populate os.environ for libraries that read it directly (OpenAI, Chainlit)
 load_dotenv()
 
 
-class Config:
-    """Application configuration."""
+class Config(BaseSettings):
+    """Application configuration (validated once at import, read-only)."""
 
-    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
-    OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-4o")
+    model_config = SettingsConfigDict(frozen=True, extra="ignore")
+
+    OPENAI_API_KEY: str = ""
+    OPENAI_MODEL: str = "gpt-4o"
 
     # Agent settings
-    MAX_ITERATIONS: int = int(os.getenv("MAX_ITERATIONS", "3"))
-    MAX_API_CALLS: int = int(os.getenv("MAX_API_CALLS", "12"))
-    CONFIDENCE_THRESHOLD: float = float(os.getenv("CONFIDENCE_THRESHOLD", "0.3"))
+    MAX_ITERATIONS: int = 3
+    MAX_API_CALLS: int = 12
+    CONFIDENCE_THRESHOLD: float = 0.3
 
     # API settings
-    API_TIMEOUT: float = float(os.getenv("API_TIMEOUT", "5.0"))
-    MAX_RESULTS_PER_SYSTEM: int = int(os.getenv("MAX_RESULTS_PER_SYSTEM", "10"))
+    API_TIMEOUT: float = 5.0
+    MAX_RESULTS_PER_SYSTEM: int = 10
 
     # HTTP pooling settings
-    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
-    HTTP_MAX_KEEPALIVE: int = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+    HTTP_MAX_CONNECTIONS: int = 20
+    HTTP_MAX_KEEPALIVE: int = 20
+    HTTP_KEEPALIVE_EXPIRY: float = 60.0
 
     # Cache settings
-    CACHE_ENABLED: bool = os.getenv("CACHE_ENABLED", "true").lower() == "true"
-    CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))
-    CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "1000"))
+    CACHE_ENABLED: bool = True
+    CACHE_TTL: int = 3600
+    CACHE_MAX_SIZE: int = 1000
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
 
     # Semantic reranking settings
-    SEMANTIC_RERANK_ENABLED: bool = (
-        os.getenv("SEMANTIC_RERANK_ENABLED", "false").lower() == "true"
-    )
-    RERANKER_MODEL: str = os.getenv(
-        "RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
-    )
-    RERANKER_WEIGHT_SEMANTIC: float = float(
-        os.getenv("RERANKER_WEIGHT_SEMANTIC", "0.6")
-    )
-    RERANKER_WEIGHT_LEXICAL: float = float(
-        os.getenv("RERANKER_WEIGHT_LEXICAL", "0.4")
-    )
+    SEMANTIC_RERANK_ENABLED: bool = False
+    RERANKER_MODEL: str = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    RERANKER_WEIGHT_SEMANTIC: float = 0.6
+    RERANKER_WEIGHT_LEXICAL: float = 0.4
 
     # Query expansion settings
-    EXPANSION_ENABLED: bool = os.getenv("EXPANSION_ENABLED", "true").lower() == "true"
-    EXPANSION_MODEL: str = os.getenv("EXPANSION_MODEL", "gpt-4o-mini")
-    EXPANSION_CACHE_TTL: int = int(os.getenv("EXPANSION_CACHE_TTL", "86400"))
+    EXPANSION_ENABLED: bool = True
+    EXPANSION_MODEL: str = "gpt-4o-mini"
+    EXPANSION_CACHE_TTL: int = 86400
 
     # Checkpointing settings
-    CHECKPOINT_ENABLED: bool = (
-        os.getenv("CHECKPOINT_ENABLED", "false").lower() == "true"
-    )
-    CHECKPOINT_BACKEND: str = os.getenv("CHECKPOINT_BACKEND", "memory")
-    CHECKPOINT_SQLITE_PATH: str = os.getenv(
-        "CHECKPOINT_SQLITE_PATH", ".clinical_codes_checkpoints.db"
-    )
-    POSTGRES_URI: str = os.getenv("POSTGRES_URI", "")
+    CHECKPOINT_ENABLED: bool = False
+    CHECKPOINT_BACKEND: str = "memory"
+    CHECKPOINT_SQLITE_PATH: str = ".clinical_codes_checkpoints.db"
+    POSTGRES_URI: str = ""
 
+    @field_validator(
+        "CACHE_ENABLED",
+        "SEMANTIC_RERANK_ENABLED",
+        "EXPANSION_ENABLED",
+        "CHECKPOINT_ENABLED",
+        mode="before",
+    )
     @classmethod
-    def validate(cls) -> None:
+    def _parse_flag(cls, value: object) -> object:
+        """Treat any env string other than "true" (case-insensitive) as False."""
+        if isinstance(value, str):
+            return value.strip().lower() == "true"
+        return value
+
+    def require_api_key(self) -> None:
         """Validate required configuration."""
-        if not cls.OPENAI_API_KEY:
+        if not self.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY environment variable is required")
 
 
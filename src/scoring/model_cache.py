@@ -3,7 +3,7 @@
 
 import asyncio
 import logging
-from typing import ClassVar
+from typing import Any, ClassVar
 
 from src.config import config
 
@@ -17,8 +17,9 @@ class ModelCache:
     _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
 
     def __init__(self):
-        self._model = None
-        self._model_name: str | None = None
+        # (model_name, model) swapped as one reference so readers never see
+        # a name from one load paired with the model from another
+        self._loaded: tuple[str, Any] | None = None
         self._load_lock = asyncio.Lock()
 
     @classmethod
@@ -49,26 +50,28 @@ class ModelCache:
         """
         target_model = model_name or config.RERANKER_MODEL
 
-        # Check if already loaded
-        if self._model is not None and self._model_name == target_model:
-            return self._model
+        # Lock-free fast path once the model is loaded
+        loaded = self._loaded
+        if loaded is not None and loaded[0] == target_model:
+            return loaded[1]
 
         async with self._load_lock:
             # Double-check after acquiring lock
-            if self._model is not None and self._model_name == target_model:
-                return self._model
+            loaded = self._loaded
+            if loaded is not None and loaded[0] == target_model:
+                return loaded[1]
 
             logger.info(f"Loading cross-encoder model: {target_model}")
 
             # Load in thread pool to avoid blocking event loop
             loop = asyncio.get_event_loop()
-            self._model = await loop.run_in_executor(
+            model = await loop.run_in_executor(
                 None, self._load_model_sync, target_model
             )
-            self._model_name = target_model
+            self._loaded = (target_model, model)
 
             logger.info(f"Model loaded: {target_model}")
-            return self._model
+            return model
 
     def _load_model_sync(self, model_name: str):
         """Synchronously load the model (called in thread pool)."""
@@ -82,17 +85,17 @@ class ModelCache:
 
     def is_loaded(self) -> bool:
         """Check if a model is currently loaded."""
-        return self._model is not None
+        return self._loaded is not None
 
     @property
     def current_model_name(self) -> str | None:
         """Get the name of the currently loaded model."""
-        return self._model_name
+        loaded = self._loaded
+        return loaded[0] if loaded is not None else None
 
     def clear(self) -> None:
         """Clear the cached model (for testing)."""
-        self._model = None
-        self._model_name = None
+        self._loaded = None
 
     @classmethod
     def reset(cls) -> None:
@@ -4,6 +4,8 @@
 import asyncio
 import logging
 import math
+from dataclasses import replace
+from functools import partial
 from typing import TYPE_CHECKING
 
 from src.config import config
@@ -13,6 +15,9 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+# Batch size for cross-encoder predict calls
+PREDICT_BATCH_SIZE = 64
+
 
 def sigmoid(x: float) -> float:
     """Apply sigmoid to normalize raw scores to [0, 1]."""
@@ -49,7 +54,7 @@ async def compute_semantic_scores(
     # Score in thread pool to avoid blocking
     loop = asyncio.get_event_loop()
     raw_scores = await loop.run_in_executor(
-        None, model.predict, pairs
+        None, partial(model.predict, pairs, batch_size=PREDICT_BATCH_SIZE)
     )
 
     # Normalize with sigmoid
@@ -61,6 +66,8 @@ def combine_scores(
     semantic_scores: list[float],
     lexical_weight: float | None = None,
     semantic_weight: float | None = None,
+    _lw_default: float = config.RERANKER_WEIGHT_LEXICAL,
+    _sw_default: float = config.RERANKER_WEIGHT_SEMANTIC,
 ) -> list[float]:
     """
     Combine lexical and semantic scores with configurable weights.
@@ -70,12 +77,14 @@ def combine_scores(
         semantic_scores: Semantic similarity scores from cross-encoder.
         lexical_weight: Weight for lexical scores (default from config).
         semantic_weight: Weight for semantic scores (default from config).
+        _lw_default: Config lexical weight, bound once at import (frozen config).
+        _sw_default: Config semantic weight, bound once at import (frozen config).
 
     Returns:
         Combined weighted scores.
     """
-    lw = lexical_weight if lexical_weight is not None else config.RERANKER_WEIGHT_LEXICAL
-    sw = semantic_weight if semantic_weight is not None else config.RERANKER_WEIGHT_SEMANTIC
+    lw = lexical_weight if lexical_weight is not None else _lw_default
+    sw = semantic_weight if semantic_weight is not None else _sw_default
 
     # Normalize weights
     total = lw + sw
@@ -119,17 +128,15 @@ async def semantic_rerank(
         # Get semantic scores
         semantic_scores = await compute_semantic_scores(query, results, model_name)
 
-        # Get original lexical scores
-        lexical_scores = [r.confidence for r in results]
-
         # Combine scores
+        lexical_scores = [r.confidence for r in results]
         combined = combine_scores(lexical_scores, semantic_scores)
 
-        # Create new results with updated confidence
-        from dataclasses import replace
-        reranked = []
-        for result, new_confidence in zip(results, combined):
-            reranked.append(replace(result, confidence=new_confidence))
+        # Create new results with updated confidence (inputs stay untouched)
+        reranked = [
+            replace(result, confidence=new_confidence)
+            for result, new_confidence in zip(results, combined)
+        ]
 
         # Sort by new confidence
         reranked.sort(key=lambda x: x.confidence, reverse=True)
@@ -173,17 +180,11 @@ async def semantic_rerank_by_system(
             by_system[r.system] = []
         by_system[r.system].append(r)
 
-    # Rerank each system independently
-    reranked_by_system = {}
-    for system, system_results in by_system.items():
-        reranked_by_system[system] = await semantic_rerank(
-            query, system_results, model_name
-        )
-
-    # Interleave results to maintain system diversity
-    all_reranked = []
-    for system_results in reranked_by_system.values():
-        all_reranked.extend(system_results)
+    # Each (query, result) pair is scored independently, so one batched
+    # predict over every system ranks each system exactly as scoring them
+    # one at a time would, without a model call per system
+    grouped = [r for system_results in by_system.values() for r in system_results]
+    all_reranked = await semantic_rerank(query, grouped, model_name)
 
     # Final sort by confidence
     all_reranked.sort(key=lambda x: x.confidence, reverse=True)
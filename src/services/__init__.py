@@ -1,7 +1,12 @@
 # ABOUTME: Services layer for infrastructure concerns.
 # ABOUTME: Provides HTTP pooling, caching, and query expansion services.
 
-from src.services.cache import InMemoryCache, APIResponseCache
+from src.services.cache import (
+    InMemoryCache,
+    RedisCacheBackend,
+    APIResponseCache,
+    create_cache_backend,
+)
 from src.services.http import HTTPClientManager
 from src.services.expansion import (
     ClinicalExpansionService,
@@ -11,7 +16,9 @@ from src.services.expansion import (
 
 __all__ = [
     "InMemoryCache",
+    "RedisCacheBackend",
     "APIResponseCache",
+    "create_cache_backend",
     "HTTPClientManager",
     "ClinicalExpansionService",
     "get_expansion_service",
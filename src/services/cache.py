@@ -3,22 +3,26 @@
 
 import asyncio
 import hashlib
-import json
+import logging
 import time
 from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Protocol
 
+import orjson
 
-@dataclass
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
 class CacheEntry:
-    """Cache entry with value and expiration."""
+    """Cache entry with value and expiration (monotonic clock)."""
 
     value: Any
     expires_at: float
 
     def is_expired(self) -> bool:
-        return time.time() > self.expires_at
+        return self.expires_at < time.monotonic()
 
 
 class CacheBackend(Protocol):
@@ -43,7 +47,8 @@ class InMemoryCache:
             entry = self._cache.get(key)
             if entry is None:
                 return None
-            if entry.is_expired():
+            # Inline expiry check: avoids a method call on the hot path
+            if entry.expires_at < time.monotonic():
                 del self._cache[key]
                 return None
             # Move to end (LRU)
@@ -54,7 +59,7 @@ class InMemoryCache:
         async with self._lock:
             self._cache[key] = CacheEntry(
                 value=value,
-                expires_at=time.time() + ttl,
+                expires_at=time.monotonic() + ttl,
             )
             self._cache.move_to_end(key)
             # Evict oldest if over capacity
@@ -74,6 +79,69 @@ class InMemoryCache:
         return len(self._cache)
 
 
+class RedisCacheBackend:
+    """Redis-backed cache shared across worker processes.
+
+    Values are serialized with msgpack. Requires the optional ``redis`` and
+    ``msgpack`` packages. Redis failures degrade to cache misses so an outage
+    slows searches down instead of failing them.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "ccf:"):
+        import msgpack
+        import redis.asyncio as redis
+        from redis.exceptions import RedisError
+
+        self._redis = redis.Redis.from_url(url)
+        self._errors = RedisError
+        self._prefix = prefix
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+
+    async def get(self, key: str) -> Any | None:
+        try:
+            raw = await self._redis.get(self._prefix + key)
+        except self._errors as e:
+            logger.warning(f"Redis get failed, treating as cache miss: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            return self._unpackb(raw)
+        except ValueError as e:  # msgpack's decode errors all subclass ValueError
+            logger.warning(f"Corrupt Redis cache entry, treating as cache miss: {e}")
+            return None
+
+    async def set(self, key: str, value: Any, ttl: int) -> None:
+        # Redis rejects non-positive expirations; treat them as already expired
+        if ttl <= 0:
+            await self.delete(key)
+            return
+        try:
+            await self._redis.set(self._prefix + key, self._packb(value), ex=ttl)
+        except self._errors as e:
+            logger.warning(f"Redis set failed, skipping cache write: {e}")
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._redis.delete(self._prefix + key)
+        except self._errors as e:
+            logger.warning(f"Redis delete failed: {e}")
+
+    async def clear(self) -> None:
+        # Only remove our own keys; the Redis database may be shared
+        try:
+            keys = [k async for k in self._redis.scan_iter(match=f"{self._prefix}*")]
+            if keys:
+                await self._redis.delete(*keys)
+        except self._errors as e:
+            logger.warning(f"Redis clear failed: {e}")
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        await self._redis.aclose()
+
+
 class APIResponseCache:
     """High-level cache for Clinical Tables API responses."""
 
@@ -89,8 +157,8 @@ class APIResponseCache:
 
     def _make_key(self, table: str, params: dict[str, Any]) -> str:
         """Generate cache key from request parameters."""
-        param_str = json.dumps(params, sort_keys=True)
-        hash_val = hashlib.sha256(param_str.encode()).hexdigest()[:16]
+        param_bytes = orjson.dumps(params, option=orjson.OPT_SORT_KEYS)
+        hash_val = hashlib.sha256(param_bytes).hexdigest()[:16]
         return f"api:{table}:{hash_val}"
 
     async def get(self, table: str, params: dict[str, Any]) -> list[Any] | None:
@@ -136,3 +204,22 @@ class APIResponseCache:
             "total": total,
             "hit_rate": self._hits / total if total > 0 else 0.0,
         }
+
+
+def create_cache_backend() -> CacheBackend:
+    """Create the configured cache backend (in-process LRU by default)."""
+    from src.config import config
+
+    backend = config.CACHE_BACKEND.lower()
+
+    if backend == "redis":
+        try:
+            redis_backend = RedisCacheBackend(config.REDIS_URL)
+            logger.info("Using Redis cache backend")
+            return redis_backend
+        except ImportError:
+            logger.warning("redis/msgpack not installed, falling back to in-memory cache")
+    elif backend != "memory":
+        logger.warning(f"Unknown cache backend '{backend}', using in-memory cache")
+
+    return InMemoryCache(max_size=config.CACHE_MAX_SIZE)
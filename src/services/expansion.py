@@ -2,10 +2,9 @@
 # ABOUTME: Suggests semantically related clinical concepts with static fallback.
 
 import asyncio
-import json
 import logging
-from typing import Any
 
+import orjson
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 
@@ -132,7 +131,7 @@ class ClinicalExpansionService:
                 content = content[4:]
             content = content.strip()
 
-        result = json.loads(content)
+        result = orjson.loads(content)
 
         # Validate and limit
         validated: dict[str, list[str]] = {
@@ -3,6 +3,7 @@
 
 import asyncio
 import logging
+import threading
 from typing import ClassVar
 
 import httpx
@@ -11,12 +12,24 @@ from src.config import config
 
 logger = logging.getLogger(__name__)
 
+# Cheap endpoint on the Clinical Tables host used to open a connection early
+WARMUP_URL = "https://clinicaltables.nlm.nih.gov/api/icd10cm/v3/search"
+
+
+class HTTPClientClosingError(httpx.TransportError):
+    """Raised when a client is requested while the pool is being closed.
+
+    Subclasses httpx.TransportError so API callers retry it and surface it
+    like any other connection failure.
+    """
+
 
 class HTTPClientManager:
     """Singleton manager for HTTP client with connection pooling."""
 
     _instance: ClassVar["HTTPClientManager | None"] = None
-    _lock: ClassVar[asyncio.Lock] = asyncio.Lock()
+    # Instance creation never awaits, so a thread lock works from any event loop
+    _thread_lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(
         self,
@@ -29,62 +42,93 @@ class HTTPClientManager:
             config, "HTTP_MAX_CONNECTIONS", 20
         )
         self._max_keepalive = max_keepalive_connections or getattr(
-            config, "HTTP_MAX_KEEPALIVE", 10
+            config, "HTTP_MAX_KEEPALIVE", 20
         )
+        self._keepalive_expiry = getattr(config, "HTTP_KEEPALIVE_EXPIRY", 60.0)
         self._client: httpx.AsyncClient | None = None
         self._client_lock = asyncio.Lock()
+        self._closing = False
 
     @classmethod
     async def get_instance(cls) -> "HTTPClientManager":
         """Get or create the singleton instance."""
-        if cls._instance is None:
-            async with cls._lock:
-                if cls._instance is None:
-                    cls._instance = cls()
-        return cls._instance
+        return cls.get_instance_sync()
 
     @classmethod
     def get_instance_sync(cls) -> "HTTPClientManager":
         """Get or create the singleton instance (sync version for init)."""
         if cls._instance is None:
-            cls._instance = cls()
+            with cls._thread_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
         return cls._instance
 
-    @staticmethod
-    def _check_http2_available() -> bool:
-        """Check if HTTP/2 support is available."""
-        try:
-            import h2  # noqa: F401
-            return True
-        except ImportError:
-            return False
-
     async def get_client(self) -> httpx.AsyncClient:
-        """Get or create the pooled HTTP client."""
+        """Get or create the pooled HTTP client.
+
+        Raises:
+            HTTPClientClosingError: If called while close() is draining the pool.
+        """
+        if self._closing:
+            raise HTTPClientClosingError("HTTP client manager is shutting down")
         if self._client is None or self._client.is_closed:
             async with self._client_lock:
                 if self._client is None or self._client.is_closed:
                     logger.debug(
                         f"Creating HTTP client pool: max_connections={self._max_connections}"
                     )
-                    # Only enable HTTP/2 if h2 is installed
-                    http2_enabled = self._check_http2_available()
-                    self._client = httpx.AsyncClient(
-                        timeout=httpx.Timeout(self._timeout),
+                    # HTTP/2 multiplexes concurrent tool searches over one
+                    # TLS connection; keep-alive keeps it warm between bursts
+                    transport = httpx.AsyncHTTPTransport(
+                        http2=True,
+                        retries=1,
                         limits=httpx.Limits(
                             max_connections=self._max_connections,
                             max_keepalive_connections=self._max_keepalive,
+                            keepalive_expiry=self._keepalive_expiry,
                         ),
-                        http2=http2_enabled,
+                    )
+                    self._client = httpx.AsyncClient(
+                        timeout=httpx.Timeout(self._timeout),
+                        transport=transport,
                     )
         return self._client
 
+    async def warmup(self, url: str = WARMUP_URL) -> None:
+        """
+        Open a pooled connection ahead of the first real request.
+
+        Sends a HEAD so the TCP/TLS/HTTP2 handshake happens off the
+        user-visible path. Skipped once the pool exists, since keep-alive
+        already holds its connection open. Runs as a fire-and-forget task,
+        so every failure is logged and ignored.
+
+        Args:
+            url: URL on the host to pre-connect to.
+        """
+        if self._client is not None and not self._client.is_closed:
+            return
+        try:
+            client = await self.get_client()
+            await client.head(url)
+        except Exception as e:
+            logger.debug(f"HTTP warmup failed: {e}")
+
     async def close(self) -> None:
-        """Close the client and release connections."""
-        if self._client and not self._client.is_closed:
-            logger.debug("Closing HTTP client pool")
-            await self._client.aclose()
-            self._client = None
+        """Close the client and release connections (safe to call repeatedly)."""
+        async with self._client_lock:
+            client = self._client
+            if client is None:
+                return
+            # Refuse new checkouts until the pool has drained
+            self._closing = True
+            try:
+                if not client.is_closed:
+                    logger.debug("Closing HTTP client pool")
+                    await client.aclose()
+            finally:
+                self._client = None
+                self._closing = False
 
     @classmethod
     async def shutdown(cls) -> None:
@@ -1,22 +1,32 @@
 # ABOUTME: Tool adapters for Clinical Tables API.
 # ABOUTME: Each tool wraps a specific medical coding system endpoint.
 
-from src.tools.base import ClinicalTablesClient, CodeResult, APIError
+from src.tools.base import (
+    ClinicalTablesClient,
+    CodeResult,
+    APIError,
+    SearchRow,
+    get_default_client,
+)
 from src.tools.icd10 import ICD10Tool
 from src.tools.loinc import LOINCTool
 from src.tools.rxterms import RxTermsTool
 from src.tools.hcpcs import HCPCSTool
 from src.tools.ucum import UCUMTool
 from src.tools.hpo import HPOTool
+from src.tools.search import search_all
 
 __all__ = [
     "ClinicalTablesClient",
     "CodeResult",
     "APIError",
+    "SearchRow",
+    "get_default_client",
     "ICD10Tool",
     "LOINCTool",
     "RxTermsTool",
     "HCPCSTool",
     "UCUMTool",
     "HPOTool",
+    "search_all",
 ]
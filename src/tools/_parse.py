@@ -0,0 +1,70 @@
+# ABOUTME: Typed parser for Clinical Tables search responses.
+# ABOUTME: Kept free of dynamic features so it can be compiled with mypyc.
+
+from typing import Any, NamedTuple
+
+
+class SearchRow(NamedTuple):
+    """One parsed Clinical Tables search hit (extra is None when not requested)."""
+
+    code: str
+    display: str
+    extra: dict[str, Any] | None = None
+
+
+def _display_text(code: str, ds: Any) -> str:
+    """Join one display entry, skipping the leading code field if present."""
+    if not ds:
+        return ""
+    if not isinstance(ds, list):
+        return ds if isinstance(ds, str) else str(ds)
+    fields = ds[1:] if len(ds) > 1 and ds[0] == code else ds
+    return " - ".join([x if isinstance(x, str) else str(x) for x in fields if x])
+
+
+def parse_search_response(
+    response: list[Any],
+    extra_fields: list[str] | None = None,
+) -> list[SearchRow]:
+    """
+    Parse the 5-element array response from Clinical Tables API.
+
+    Args:
+        response: Decoded JSON array [total, codes, extra_data, displays, systems].
+        extra_fields: Extra (ef) fields to attach to each row, if requested.
+
+    Returns:
+        One SearchRow per returned code.
+    """
+    # Fast path: zero-hit responses are common and need no further work
+    if not response or len(response) < 4 or response[0] == 0 or not response[1]:
+        return []
+
+    codes: list[str] = response[1]
+
+    extra_data: dict[str, list[Any]] = response[2] or {}
+    display_strings: list[Any] = response[3] or []
+
+    # Multi-field display: skip the leading code field if present, join the rest
+    displays: list[str] = [
+        _display_text(code, ds) for code, ds in zip(codes, display_strings)
+    ]
+    missing = len(codes) - len(displays)
+    if missing > 0:
+        displays.extend([""] * missing)
+
+    if extra_fields and extra_data:
+        # Resolve each requested field's column once, not per row
+        extra_columns = [
+            (field, extra_data[field]) for field in extra_fields if field in extra_data
+        ]
+        return [
+            SearchRow(
+                code,
+                display,
+                {field: column[i] for field, column in extra_columns if i < len(column)},
+            )
+            for i, (code, display) in enumerate(zip(codes, displays))
+        ]
+
+    return [SearchRow(code, display) for code, display in zip(codes, displays)]
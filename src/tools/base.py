@@ -3,11 +3,16 @@
 
 import asyncio
 import logging
-from dataclasses import dataclass, asdict
+import threading
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
 from typing import Any, TYPE_CHECKING
-from urllib.parse import urlencode
+from urllib.parse import quote_plus
 
 import httpx
+import orjson
+
+from src.tools._parse import SearchRow, parse_search_response
 
 if TYPE_CHECKING:
     from src.services.cache import APIResponseCache
@@ -16,15 +21,31 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
+# Query keys whose values are comma-joined ASCII field names or ints
+_UNQUOTED_PARAMS = frozenset({"maxList", "sf", "df", "ef"})
+
+
+def _encode_query(params: dict[str, Any]) -> str:
+    """Encode Clinical Tables query params, quoting only free-text values."""
+    return "&".join(
+        f"{k}={v}" if k in _UNQUOTED_PARAMS else f"{k}={quote_plus(str(v))}"
+        for k, v in params.items()
+    )
+
+
 class APIError(Exception):
     """Raised when Clinical Tables API request fails."""
 
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class CodeResult:
-    """Normalized result from any Clinical Tables API endpoint."""
+    """Normalized result from any Clinical Tables API endpoint.
+
+    Adapters build these positionally, in field order: system, code,
+    display, confidence, metadata, source.
+    """
 
     system: str
     code: str
@@ -35,7 +56,21 @@ class CodeResult:
 
     def to_dict(self) -> dict[str, Any]:
         """Serialize to dictionary."""
-        return asdict(self)
+        return {
+            "system": self.system,
+            "code": self.code,
+            "display": self.display,
+            "confidence": self.confidence,
+            "metadata": dict(self.metadata),
+            "source": dict(self.source),
+        }
+
+
+class _DefaultCache:
+    """Sentinel type for "use the configured cache" (None means no cache)."""
+
+
+_DEFAULT_CACHE = _DefaultCache()
 
 
 class ClinicalTablesClient:
@@ -45,51 +80,65 @@ class ClinicalTablesClient:
         self,
         timeout: float = 5.0,
         max_retries: int = 2,
-        cache: "APIResponseCache | None" = None,
+        cache: "APIResponseCache | None | _DefaultCache" = _DEFAULT_CACHE,
         http_manager: "HTTPClientManager | None" = None,
     ):
         self.base_url = "https://clinicaltables.nlm.nih.gov/api"
         self.timeout = timeout
         self.max_retries = max_retries
-        self._cache = cache
+        self._cache = self._default_cache() if isinstance(cache, _DefaultCache) else cache
         self._http_manager = http_manager
+        self._url_prefixes: dict[tuple[str, str | None, str | None, str | None], str] = {}
+        self._inflight: dict[tuple[Any, ...], asyncio.Task[list[Any]]] = {}
+
+    @staticmethod
+    def _default_cache() -> "APIResponseCache | None":
+        """Create a response cache on the configured backend if caching is enabled."""
+        from src.config import config
+
+        if not config.CACHE_ENABLED:
+            return None
+
+        from src.services.cache import APIResponseCache, create_cache_backend
+
+        return APIResponseCache(
+            backend=create_cache_backend(),
+            default_ttl=config.CACHE_TTL,
+        )
 
     def build_url(self, table: str, params: dict[str, Any]) -> str:
         """Build full API URL with query parameters."""
         base = f"{self.base_url}/{table}/v3/search"
         if params:
-            return f"{base}?{urlencode(params)}"
+            return f"{base}?{_encode_query(params)}"
         return base
 
     async def _get_client(self) -> httpx.AsyncClient:
-        """Get HTTP client (pooled if manager provided, otherwise create new)."""
-        if self._http_manager:
-            return await self._http_manager.get_client()
-        return httpx.AsyncClient(timeout=self.timeout)
-
-    async def _fetch(self, url: str) -> list[Any]:
-        """Execute HTTP GET request and return JSON response."""
-        if self._http_manager:
-            client = await self._get_client()
-            response = await client.get(url)
-            response.raise_for_status()
-            return response.json()
-        else:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url)
-                response.raise_for_status()
-                return response.json()
+        """Get the pooled HTTP client (shared singleton if no manager provided)."""
+        if self._http_manager is None:
+            from src.services.http import HTTPClientManager
+
+            self._http_manager = await HTTPClientManager.get_instance()
+        return await self._http_manager.get_client()
+
+    async def _fetch(self, url: str | httpx.URL) -> list[Any]:
+        """Execute HTTP GET request over a keep-alive connection and return JSON response."""
+        client = await self._get_client()
+        response = await client.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        # Body is already buffered; orjson decodes the nested arrays much faster
+        return orjson.loads(response.content)
 
     async def search(
         self,
         table: str,
         term: str,
         max_results: int = 10,
-        search_fields: list[str] | None = None,
-        display_fields: list[str] | None = None,
-        extra_fields: list[str] | None = None,
+        search_fields: Sequence[str] | None = None,
+        display_fields: Sequence[str] | None = None,
+        extra_fields: Sequence[str] | None = None,
         use_cache: bool = True,
-    ) -> list[dict[str, Any]]:
+    ) -> list[SearchRow]:
         """
         Search a Clinical Tables endpoint.
 
@@ -103,22 +152,72 @@ class ClinicalTablesClient:
             use_cache: Whether to use caching (default True)
 
         Returns:
-            List of result dictionaries with code, display, and optional extra fields.
+            List of SearchRow tuples with code, display, and optional extra fields.
 
         Raises:
             APIError: On timeout, HTTP error, or invalid response.
         """
-        params: dict[str, Any] = {
-            "terms": term,
-            "maxList": min(max_results, 500),
-        }
+        return await self.search_precomposed(
+            table,
+            term,
+            max_results,
+            sf=",".join(search_fields) if search_fields else None,
+            df=",".join(display_fields) if display_fields else None,
+            ef=",".join(extra_fields) if extra_fields else None,
+            use_cache=use_cache,
+        )
+
+    def _url_prefix(
+        self, table: str, sf: str | None, df: str | None, ef: str | None
+    ) -> str:
+        """Return the encoded URL up to the per-call params, memoized per field set."""
+        key = (table, sf, df, ef)
+        prefix = self._url_prefixes.get(key)
+        if prefix is None:
+            fixed = {k: v for k, v in (("sf", sf), ("df", df), ("ef", ef)) if v}
+            query = f"{_encode_query(fixed)}&" if fixed else ""
+            prefix = f"{self.base_url}/{table}/v3/search?{query}"
+            self._url_prefixes[key] = prefix
+        return prefix
+
+    async def search_precomposed(
+        self,
+        table: str,
+        term: str,
+        max_results: int = 10,
+        sf: str | None = None,
+        df: str | None = None,
+        ef: str | None = None,
+        use_cache: bool = True,
+    ) -> list[SearchRow]:
+        """
+        Search with already comma-joined field lists (fast path for fixed tools).
 
-        if search_fields:
-            params["sf"] = ",".join(search_fields)
-        if display_fields:
-            params["df"] = ",".join(display_fields)
-        if extra_fields:
-            params["ef"] = ",".join(extra_fields)
+        Args:
+            table: API table name
+            term: Search term
+            max_results: Maximum results to return (default 10, max 500)
+            sf: Comma-joined search fields
+            df: Comma-joined display fields
+            ef: Comma-joined extra fields
+            use_cache: Whether to use caching (default True)
+
+        Returns:
+            List of SearchRow tuples with code, display, and optional extra fields.
+
+        Raises:
+            APIError: On timeout, HTTP error, or invalid response.
+        """
+        max_list = min(max_results, 500)
+        extra_fields = ef.split(",") if ef else None
+
+        params: dict[str, Any] = {"terms": term, "maxList": max_list}
+        if sf:
+            params["sf"] = sf
+        if df:
+            params["df"] = df
+        if ef:
+            params["ef"] = ef
 
         # Check cache first
         if use_cache and self._cache:
@@ -127,43 +226,79 @@ class ClinicalTablesClient:
                 logger.debug(f"Cache hit for {table}: {term}")
                 return self._parse_response(cached, extra_fields)
 
-        url = self.build_url(table, params)
-
-        # Retry logic with exponential backoff
+        # Single-flight: identical concurrent searches share one network call.
+        # Check-and-insert has no await in between, so it is atomic on the loop.
+        key = (table, term, max_list, sf, df, ef)
+        task = self._inflight.get(key)
+        if task is None:
+            url = f"{self._url_prefix(table, sf, df, ef)}terms={quote_plus(term)}&maxList={max_list}"
+            # Detached task: the fetch belongs to every waiter, not to the caller
+            # that started it, so cancelling one caller cannot abort the others.
+            task = asyncio.ensure_future(self._fetch_with_retry(table, url, params))
+            self._inflight[key] = task
+            task.add_done_callback(self._inflight_done(key))
+        else:
+            logger.debug(f"Joining in-flight request for {table}: {term}")
+
+        response = await asyncio.shield(task)
+        return self._parse_response(response, extra_fields)
+
+    def _inflight_done(
+        self, key: tuple[Any, ...]
+    ) -> Callable[["asyncio.Task[list[Any]]"], None]:
+        """Build the callback that retires a finished in-flight fetch."""
+
+        def done(task: "asyncio.Task[list[Any]]") -> None:
+            if self._inflight.get(key) is task:
+                del self._inflight[key]
+            if not task.cancelled():
+                task.exception()  # Mark retrieved when every waiter has left
+
+        return done
+
+    async def _fetch_with_retry(
+        self, table: str, url: str, params: dict[str, Any]
+    ) -> list[Any]:
+        """Fetch a search URL with retries and cache the raw response."""
+        # Parse once; retries reuse the URL object instead of re-parsing the string
+        request_url = httpx.URL(url)
+        # Retry logic with exponential backoff. Only transport, status and
+        # decode failures are retried; programming errors propagate as-is.
         last_error: APIError | None = None
+        last_cause: Exception | None = None
         for attempt in range(self.max_retries + 1):
             try:
-                response = await self._fetch(url)
-
-                # Cache successful response
-                if self._cache:
-                    await self._cache.set(table, params, response)
-
-                return self._parse_response(response, extra_fields)
-
+                response = await self._fetch(request_url)
             except httpx.TimeoutException as e:
-                last_error = APIError(f"Request timeout for {table}: {e}")
+                last_error, last_cause = APIError(f"Request timeout for {table}: {e}"), e
             except httpx.HTTPStatusError as e:
-                last_error = APIError(
-                    f"HTTP error {e.response.status_code} for {table}: {e}"
+                last_error, last_cause = (
+                    APIError(f"HTTP error {e.response.status_code} for {table}: {e}"),
+                    e,
                 )
                 if e.response.status_code < 500:
                     break  # Don't retry client errors
-            except Exception as e:
-                last_error = APIError(f"Request failed for {table}: {e}")
+            except (httpx.RequestError, orjson.JSONDecodeError) as e:
+                last_error, last_cause = APIError(f"Request failed for {table}: {e}"), e
+            else:
+                # Cache successful response
+                if self._cache:
+                    await self._cache.set(table, params, response)
+
+                return response
 
             if attempt < self.max_retries:
                 wait_time = 0.5 * (2**attempt)  # Exponential backoff
                 logger.debug(f"Retry {attempt + 1}/{self.max_retries} after {wait_time}s")
                 await asyncio.sleep(wait_time)
 
-        raise last_error if last_error else APIError(f"Unknown error for {table}")
+        raise (last_error or APIError(f"Unknown error for {table}")) from last_cause
 
     def _parse_response(
         self,
         response: list[Any],
         extra_fields: list[str] | None = None,
-    ) -> list[dict[str, Any]]:
+    ) -> list[SearchRow]:
         """
         Parse the 5-element array response from Clinical Tables API.
 
@@ -174,43 +309,19 @@ class ClinicalTablesClient:
         [3] display_strings: list[list[str]]
         [4] code_systems: list | None
         """
-        if not response or len(response) < 4:
-            return []
-
-        total_count = response[0]
-        codes = response[1] or []
-        extra_data = response[2] or {}
-        display_strings = response[3] or []
-
-        if not codes:
-            return []
-
-        results = []
-        for i, code in enumerate(codes):
-            display = ""
-            if i < len(display_strings) and display_strings[i]:
-                ds = display_strings[i]
-                if isinstance(ds, list):
-                    # Multi-field display: skip the code field, join remaining
-                    # If first element matches code, skip it; otherwise join all
-                    if len(ds) > 1 and ds[0] == code:
-                        display = " - ".join(str(x) for x in ds[1:] if x)
-                    else:
-                        display = " - ".join(str(x) for x in ds if x)
-                else:
-                    display = str(ds)
-
-            result: dict[str, Any] = {
-                "code": code,
-                "display": display,
-            }
-
-            if extra_fields and extra_data:
-                result["extra"] = {}
-                for field in extra_fields:
-                    if field in extra_data and i < len(extra_data[field]):
-                        result["extra"][field] = extra_data[field][i]
-
-            results.append(result)
-
-        return results
+        return parse_search_response(response, extra_fields)
+
+
+# Process-wide client shared by tools constructed without an explicit client
+_default_client: ClinicalTablesClient | None = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client() -> ClinicalTablesClient:
+    """Get or create the shared ClinicalTablesClient (one pool, one cache)."""
+    global _default_client
+    if _default_client is None:
+        with _default_client_lock:
+            if _default_client is None:
+                _default_client = ClinicalTablesClient()
+    return _default_client
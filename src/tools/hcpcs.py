@@ -1,17 +1,24 @@
 # ABOUTME: HCPCS tool adapter for medical supply and service code lookup.
 # ABOUTME: Wraps Clinical Tables API for Healthcare Common Procedure Coding System.
 
-from src.tools.base import ClinicalTablesClient, CodeResult
+import sys
+
+from src.tools.base import ClinicalTablesClient, CodeResult, get_default_client
 
 
 class HCPCSTool:
     """Tool for searching HCPCS codes."""
 
-    system = "HCPCS"
+    system = sys.intern("HCPCS")
     table = "hcpcs"
+    search_fields = ("code", "short_desc", "long_desc")
+    display_fields = ("code", "long_desc")
+    # Pre-joined once at class creation for search_precomposed
+    _sf = ",".join(search_fields)
+    _df = ",".join(display_fields)
 
     def __init__(self, client: ClinicalTablesClient | None = None):
-        self.client = client or ClinicalTablesClient()
+        self.client = client or get_default_client()
 
     async def search(self, term: str, max_results: int = 10) -> list[CodeResult]:
         """
@@ -24,22 +31,17 @@ class HCPCSTool:
         Returns:
             List of CodeResult objects with HCPCS codes
         """
-        results = await self.client.search(
+        results = await self.client.search_precomposed(
             table=self.table,
             term=term,
             max_results=max_results,
-            search_fields=["code", "short_desc", "long_desc"],
-            display_fields=["code", "long_desc"],
+            sf=self._sf,
+            df=self._df,
         )
 
+        system = self.system
+        source = {"tool": "hcpcs", "term_used": term}
         return [
-            CodeResult(
-                system=self.system,
-                code=r["code"],
-                display=r["display"],
-                confidence=0.0,
-                metadata={},
-                source={"tool": "hcpcs", "term_used": term},
-            )
+            CodeResult(system, r.code, r.display, 0.0, {}, dict(source))
             for r in results
         ]
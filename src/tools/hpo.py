@@ -1,17 +1,26 @@
 # ABOUTME: HPO tool adapter for phenotype and symptom code lookup.
 # ABOUTME: Wraps Clinical Tables API for Human Phenotype Ontology.
 
-from src.tools.base import ClinicalTablesClient, CodeResult
+import sys
+
+from src.tools.base import ClinicalTablesClient, CodeResult, get_default_client
 
 
 class HPOTool:
     """Tool for searching HPO phenotype codes."""
 
-    system = "HPO"
+    system = sys.intern("HPO")
     table = "hpo"
+    search_fields = ("id", "name", "synonym.term")
+    display_fields = ("id", "name")
+    extra_fields = ("definition",)
+    # Pre-joined once at class creation for search_precomposed
+    _sf = ",".join(search_fields)
+    _df = ",".join(display_fields)
+    _ef = ",".join(extra_fields)
 
     def __init__(self, client: ClinicalTablesClient | None = None):
-        self.client = client or ClinicalTablesClient()
+        self.client = client or get_default_client()
 
     async def search(self, term: str, max_results: int = 10) -> list[CodeResult]:
         """
@@ -24,23 +33,18 @@ class HPOTool:
         Returns:
             List of CodeResult objects with HPO codes
         """
-        results = await self.client.search(
+        results = await self.client.search_precomposed(
             table=self.table,
             term=term,
             max_results=max_results,
-            search_fields=["id", "name", "synonym.term"],
-            display_fields=["id", "name"],
-            extra_fields=["definition"],
+            sf=self._sf,
+            df=self._df,
+            ef=self._ef,
         )
 
+        system = self.system
+        source = {"tool": "hpo", "term_used": term}
         return [
-            CodeResult(
-                system=self.system,
-                code=r["code"],
-                display=r["display"],
-                confidence=0.0,
-                metadata=r.get("extra", {}),
-                source={"tool": "hpo", "term_used": term},
-            )
+            CodeResult(system, r.code, r.display, 0.0, r.extra or {}, dict(source))
             for r in results
         ]
@@ -1,17 +1,24 @@
 # ABOUTME: ICD-10-CM tool adapter for diagnosis code lookup.
 # ABOUTME: Wraps Clinical Tables API for International Classification of Diseases codes.
 
-from src.tools.base import ClinicalTablesClient, CodeResult
+import sys
+
+from src.tools.base import ClinicalTablesClient, CodeResult, get_default_client
 
 
 class ICD10Tool:
     """Tool for searching ICD-10-CM diagnosis codes."""
 
-    system = "ICD-10-CM"
+    system = sys.intern("ICD-10-CM")
     table = "icd10cm"
+    search_fields = ("code", "name")
+    display_fields = ("code", "name")
+    # Pre-joined once at class creation for search_precomposed
+    _sf = ",".join(search_fields)
+    _df = ",".join(display_fields)
 
     def __init__(self, client: ClinicalTablesClient | None = None):
-        self.client = client or ClinicalTablesClient()
+        self.client = client or get_default_client()
 
     async def search(self, term: str, max_results: int = 10) -> list[CodeResult]:
         """
@@ -24,22 +31,17 @@ class ICD10Tool:
         Returns:
             List of CodeResult objects with diagnosis codes
         """
-        results = await self.client.search(
+        results = await self.client.search_precomposed(
             table=self.table,
             term=term,
             max_results=max_results,
-            search_fields=["code", "name"],
-            display_fields=["code", "name"],
+            sf=self._sf,
+            df=self._df,
         )
 
+        system = self.system
+        source = {"tool": "icd10", "term_used": term}
         return [
-            CodeResult(
-                system=self.system,
-                code=r["code"],
-                display=r["display"],
-                confidence=0.0,
-                metadata={},
-                source={"tool": "icd10", "term_used": term},
-            )
+            CodeResult(system, r.code, r.display, 0.0, {}, dict(source))
             for r in results
         ]
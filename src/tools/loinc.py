@@ -1,17 +1,26 @@
 # ABOUTME: LOINC tool adapter for lab test and measurement code lookup.
 # ABOUTME: Wraps Clinical Tables API for Logical Observation Identifiers Names and Codes.
 
-from src.tools.base import ClinicalTablesClient, CodeResult
+import sys
+
+from src.tools.base import ClinicalTablesClient, CodeResult, get_default_client
 
 
 class LOINCTool:
     """Tool for searching LOINC lab test codes."""
 
-    system = "LOINC"
+    system = sys.intern("LOINC")
     table = "loinc_items"
+    search_fields = ("text", "COMPONENT", "LONG_COMMON_NAME", "SHORTNAME", "RELATEDNAMES2")
+    display_fields = ("LOINC_NUM", "LONG_COMMON_NAME")
+    extra_fields = ("COMPONENT", "PROPERTY", "METHOD_TYP")
+    # Pre-joined once at class creation for search_precomposed
+    _sf = ",".join(search_fields)
+    _df = ",".join(display_fields)
+    _ef = ",".join(extra_fields)
 
     def __init__(self, client: ClinicalTablesClient | None = None):
-        self.client = client or ClinicalTablesClient()
+        self.client = client or get_default_client()
 
     async def search(self, term: str, max_results: int = 10) -> list[CodeResult]:
         """
@@ -24,29 +33,18 @@ class LOINCTool:
         Returns:
             List of CodeResult objects with LOINC codes
         """
-        results = await self.client.search(
+        results = await self.client.search_precomposed(
             table=self.table,
             term=term,
             max_results=max_results,
-            search_fields=[
-                "text",
-                "COMPONENT",
-                "LONG_COMMON_NAME",
-                "SHORTNAME",
-                "RELATEDNAMES2",
-            ],
-            display_fields=["LOINC_NUM", "LONG_COMMON_NAME"],
-            extra_fields=["COMPONENT", "PROPERTY", "METHOD_TYP"],
+            sf=self._sf,
+            df=self._df,
+            ef=self._ef,
         )
 
+        system = self.system
+        source = {"tool": "loinc", "term_used": term}
         return [
-            CodeResult(
-                system=self.system,
-                code=r["code"],
-                display=r["display"],
-                confidence=0.0,
-                metadata=r.get("extra", {}),
-                source={"tool": "loinc", "term_used": term},
-            )
+            CodeResult(system, r.code, r.display, 0.0, r.extra or {}, dict(source))
             for r in results
         ]
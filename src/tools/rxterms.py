@@ -1,17 +1,26 @@
 # ABOUTME: RxTerms tool adapter for drug name and code lookup.
 # ABOUTME: Wraps Clinical Tables API for RxNorm-derived drug terminology.
 
-from src.tools.base import ClinicalTablesClient, CodeResult
+import sys
+
+from src.tools.base import ClinicalTablesClient, CodeResult, get_default_client
 
 
 class RxTermsTool:
     """Tool for searching RxTerms drug codes."""
 
-    system = "RxTerms"
+    system = sys.intern("RxTerms")
     table = "rxterms"
+    search_fields = ("DISPLAY_NAME", "DISPLAY_NAME_SYNONYM")
+    display_fields = ("DISPLAY_NAME",)
+    extra_fields = ("RXCUIS", "STRENGTHS_AND_FORMS", "SXDG_RXCUI")
+    # Pre-joined once at class creation for search_precomposed
+    _sf = ",".join(search_fields)
+    _df = ",".join(display_fields)
+    _ef = ",".join(extra_fields)
 
     def __init__(self, client: ClinicalTablesClient | None = None):
-        self.client = client or ClinicalTablesClient()
+        self.client = client or get_default_client()
 
     async def search(self, term: str, max_results: int = 10) -> list[CodeResult]:
         """
@@ -24,23 +33,18 @@ class RxTermsTool:
         Returns:
             List of CodeResult objects with drug codes
         """
-        results = await self.client.search(
+        results = await self.client.search_precomposed(
             table=self.table,
             term=term,
             max_results=max_results,
-            search_fields=["DISPLAY_NAME", "DISPLAY_NAME_SYNONYM"],
-            display_fields=["DISPLAY_NAME"],
-            extra_fields=["RXCUIS", "STRENGTHS_AND_FORMS", "SXDG_RXCUI"],
+            sf=self._sf,
+            df=self._df,
+            ef=self._ef,
         )
 
+        system = self.system
+        source = {"tool": "rxterms", "term_used": term}
         return [
-            CodeResult(
-                system=self.system,
-                code=r["code"],
-                display=r["display"],
-                confidence=0.0,
-                metadata=r.get("extra", {}),
-                source={"tool": "rxterms", "term_used": term},
-            )
+            CodeResult(system, r.code, r.display, 0.0, r.extra or {}, dict(source))
             for r in results
         ]
@@ -0,0 +1,46 @@
+# ABOUTME: Concurrent fan-out search across all coding system tools.
+# ABOUTME: Issues one request per system over a shared pooled client.
+
+import asyncio
+
+from src.tools.base import ClinicalTablesClient, CodeResult, get_default_client
+from src.tools.hcpcs import HCPCSTool
+from src.tools.hpo import HPOTool
+from src.tools.icd10 import ICD10Tool
+from src.tools.loinc import LOINCTool
+from src.tools.rxterms import RxTermsTool
+from src.tools.ucum import UCUMTool
+
+TOOL_CLASSES = (ICD10Tool, LOINCTool, RxTermsTool, HCPCSTool, UCUMTool, HPOTool)
+
+
+async def search_all(
+    term: str,
+    max_results: int = 10,
+    client: ClinicalTablesClient | None = None,
+) -> dict[str, list[CodeResult] | BaseException]:
+    """
+    Search every coding system for a term concurrently.
+
+    All tools share one client, so the requests ride the same connection
+    pool (multiplexed over a single connection when HTTP/2 is available)
+    and total latency is bounded by the slowest system, not the sum.
+
+    Args:
+        term: Search term
+        max_results: Maximum results to return per system
+        client: Optional client to share (defaults to the shared client)
+
+    Returns:
+        Dict mapping system name to its results, or to the exception
+        raised if that system's search failed.
+    """
+    shared = client or get_default_client()
+    tools = [tool_cls(client=shared) for tool_cls in TOOL_CLASSES]
+
+    results = await asyncio.gather(
+        *(tool.search(term, max_results=max_results) for tool in tools),
+        return_exceptions=True,
+    )
+
+    return {tool.system: result for tool, result in zip(tools, results)}
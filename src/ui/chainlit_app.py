@@ -1,171 +1,371 @@
 # ABOUTME: Chainlit chat interface for Clinical Codes Finder.
 # ABOUTME: ChatGPT-style UI with streaming steps and settings panel.
 
+import asyncio
 import csv
+import hashlib
 import io
-from datetime import datetime
+import re
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass
 
+import bcrypt
 import chainlit as cl
-from chainlit.data import get_data_layer
-from passlib.hash import bcrypt
 
 from src.agent.graph import run_agent_streaming
+from src.agent.multi_hop import fetch_hierarchy
 from src.config import config
+from src.services.cache import InMemoryCache
+from src.services.http import HTTPClientManager
 from src.ui.data_layer import FileDataLayer
 
 # Validate configuration at module load
-config.validate()
+config.require_api_key()
 
 # User credentials: {username: bcrypt_hash}
-# To generate a new hash, run: python -c "from passlib.hash import bcrypt; print(bcrypt.hash('your_password'))"
+# To generate a new hash, run: python -c "import bcrypt; print(bcrypt.hashpw(b'your_password', bcrypt.gensalt()).decode())"
 USERS = {
     "admin": "$2b$12$LQv3c1yqBWVHxkd0LHAkCOYz6TtxMQJqhN8/X4.q/AEb0OZIOV1Cm",  # default: "changeme"
 }
 
 
+# Final agent states for repeat queries; holds CodeResult objects, so in-process only
+_agent_state_cache = InMemoryCache(max_size=config.CACHE_MAX_SIZE)
+# Shown on the Processing step when a repeat query is answered from the cache
+CACHE_HIT_NOTE = "*Cached answer: reused the results of an identical recent search.*"
+
+
+# Leading ICD-10 qualifiers that don't help with drug search (may be stacked)
+_ICD_PREFIX_RE = re.compile(
+    r"^(?:(?:family history of|personal history of|encounter for|screening for"
+    r"|supervision of|sequelae of|other|unspecified|type 1|type 2|with|without)"
+    r"(?:\s+|$))+",
+    re.IGNORECASE,
+)
+
+
+def _agent_state_key(query: str, multi_hop_enabled: bool) -> str:
+    """Build the agent-state cache key from the normalized query and settings."""
+    raw = f"{query.strip().lower()}|{multi_hop_enabled}"
+    return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+
+# AgentState fields typed as lists; known up front so merging skips isinstance checks
+_LIST_STATE_KEYS = frozenset({
+    "selected_systems",
+    "clarification_options",
+    "search_terms",
+    "related_terms",
+    "api_calls",
+    "consolidated_results",
+    "reasoning_trace",
+})
+
+
+# Final-state fields the UI reads back; api_calls, raw_results and the other
+# working fields can be large and are never rendered, so they aren't cached
+CACHED_STATE_FIELDS = (
+    "summary",
+    "consolidated_results",
+    "reasoning_trace",
+    "selected_systems",
+    "search_terms",
+    "related_terms",
+    "hierarchy_info",
+    "clarification_needed",
+    "clarification_options",
+)
+
+
+def slim_state(state: dict) -> dict:
+    """Keep only the final-state fields needed to re-render a cached answer."""
+    return {key: state[key] for key in CACHED_STATE_FIELDS if key in state}
+
+
+def merge_state_deltas(deltas: list[dict]) -> dict:
+    """
+    Materialize the final agent state from per-node updates in one pass.
+
+    List fields accumulate across nodes; any other field takes its latest
+    value. Lists are copied on first sight so event payloads are never mutated.
+
+    Args:
+        deltas: State updates in the order the agent emitted them.
+
+    Returns:
+        Merged final state.
+    """
+    final_state: dict = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            if key in _LIST_STATE_KEYS:
+                current = final_state.get(key)
+                if current is None:
+                    final_state[key] = list(value)
+                else:
+                    current.extend(value)
+            else:
+                final_state[key] = value
+    return final_state
+
+
 # Register the file-based data layer for thread persistence
 @cl.data_layer
 def get_file_data_layer():
     return FileDataLayer()
 
 
+# Hashes encoded once; checkpw reads cost and salt straight from the stored bytes
+_USER_HASHES = {username: hashed.encode() for username, hashed in USERS.items()}
+
+# Recent successful logins: (username, sha256(password)) -> expiry (monotonic).
+# Skips the deliberately slow bcrypt KDF on repeat logins; failures are never cached.
+AUTH_CACHE_TTL = 300
+AUTH_CACHE_MAX_SIZE = 128
+_auth_cache: OrderedDict[tuple[str, bytes], float] = OrderedDict()
+
+
 @cl.password_auth_callback
 def auth_callback(username: str, password: str):
     """Authenticate users against stored bcrypt password hashes."""
-    if username in USERS:
-        if bcrypt.verify(password, USERS[username]):
-            return cl.User(
-                identifier=username,
-                metadata={"role": "user", "provider": "credentials"},
-            )
-    return None
+    if username not in USERS:
+        return None
+
+    key = (username, hashlib.sha256(password.encode()).digest())
+    expires_at = _auth_cache.get(key)
+    now = time.monotonic()
+    if expires_at is None or expires_at < now:
+        # bcrypt only uses the first 72 bytes of the password
+        if not bcrypt.checkpw(password.encode()[:72], _USER_HASHES[username]):
+            _auth_cache.pop(key, None)
+            return None
+        _auth_cache[key] = now + AUTH_CACHE_TTL
+        _auth_cache.move_to_end(key)
+        while len(_auth_cache) > AUTH_CACHE_MAX_SIZE:
+            _auth_cache.popitem(last=False)
+
+    return cl.User(
+        identifier=username,
+        metadata={"role": "user", "provider": "credentials"},
+    )
+
+
+# Fields every normalized result dict carries
+RESULT_FIELDS = ("system", "code", "display", "confidence", "metadata")
+
+
+def normalize_results(results: list) -> list[dict]:
+    """
+    Convert agent results (CodeResult objects or dicts) to plain dicts once.
+
+    Rendering, actions, and CSV export then read fields by key without
+    re-checking the type of every result on every access.
+
+    Args:
+        results: CodeResult objects and/or result dicts.
+
+    Returns:
+        Dicts with every key in RESULT_FIELDS. Missing or empty values are
+        filled with "" (strings), 0.0 (confidence), or {} (metadata).
+    """
+    return [
+        {
+            "system": r.get("system") or "",
+            "code": r.get("code") or "",
+            "display": r.get("display") or "",
+            "confidence": r.get("confidence") or 0.0,
+            "metadata": r.get("metadata") or {},
+        }
+        if isinstance(r, dict)
+        else {
+            "system": r.system,
+            "code": r.code,
+            "display": r.display,
+            "confidence": r.confidence,
+            "metadata": r.metadata,
+        }
+        for r in results
+    ]
+
+
+# Leading characters spreadsheets treat as the start of a formula
+_INJECTION_CHARS = ("=", "+", "@", "-")
 
 
 def _sanitize_csv_value(val: str) -> str:
     """Sanitize CSV values to prevent formula injection in spreadsheet applications."""
-    if val and val[0] in "=+@-":
+    # startswith is False for "", so no separate emptiness check is needed
+    if val.startswith(_INJECTION_CHARS):
         return f"'{val}"
     return val
 
 
+def _csv_field(val: str) -> str:
+    """Sanitize and quote a single CSV field."""
+    escaped = _sanitize_csv_value(val).replace('"', '""')
+    return f'"{escaped}"'
+
+
+def _truncate(text: str, limit: int) -> str:
+    """Shorten text to limit characters, marking the cut with an ellipsis."""
+    return text if len(text) <= limit else f"{text[:limit]}..."
+
+
+# Preformatted badges for every in-range percentage
+_BADGES = tuple(f"{i}%" for i in range(101))
+
+
 def get_confidence_badge(confidence: float) -> str:
     """Get a percentage badge based on confidence level."""
     pct = int(confidence * 100)
+    if 0 <= pct <= 100:
+        return _BADGES[pct]
     return f"{pct}%"
 
 
+# Button budgets for a results message
+MAX_SUGGESTIONS = 4
+MAX_ACTIONS = 8
+
+
 def get_follow_up_suggestions(results: list, query: str) -> list[cl.Action]:
     """Generate contextual follow-up suggestion buttons based on search results."""
+    Action = cl.Action  # Local binding for the repeated constructor calls
     suggestions = []
 
-    def get_attr(r, key):
-        if isinstance(r, dict):
-            return r.get(key)
-        return getattr(r, key, None)
-
-    # Collect systems found
-    systems_found = set()
+    # Top (first) result per system, collected in a single pass
+    top_by_system: dict[str, dict] = {}
     for r in results:
-        system = get_attr(r, "system")
-        if system:
-            systems_found.add(system)
+        system = r["system"]
+        if system and system not in top_by_system:
+            top_by_system[system] = r
 
     # ICD-10 follow-ups
-    if "ICD-10-CM" in systems_found:
-        top_icd = next((r for r in results if get_attr(r, "system") == "ICD-10-CM"), None)
-        if top_icd:
-            code = get_attr(top_icd, "code")
-            display = get_attr(top_icd, "display") or ""
-            short_display = display[:25] + "..." if len(display) > 25 else display
-
-            suggestions.append(cl.Action(
-                name="followup",
-                payload={"type": "meds_for_diagnosis", "code": code, "display": display},
-                label=f"Medications for {short_display}",
-            ))
-            suggestions.append(cl.Action(
-                name="followup",
-                payload={"type": "check_billable", "code": code},
-                label=f"Is {code} billable?",
-            ))
+    if top_icd := top_by_system.get("ICD-10-CM"):
+        code = top_icd["code"]
+        display = top_icd["display"]
+        short_display = _truncate(display, 25)
+
+        suggestions.append(Action(
+            name="followup",
+            payload={"type": "meds_for_diagnosis", "code": code, "display": display},
+            label=f"Medications for {short_display}",
+        ))
+        suggestions.append(Action(
+            name="followup",
+            payload={"type": "check_billable", "code": code},
+            label=f"Is {code} billable?",
+        ))
 
     # RxTerms follow-ups
-    if "RxTerms" in systems_found:
-        top_rx = next((r for r in results if get_attr(r, "system") == "RxTerms"), None)
-        if top_rx:
-            code = get_attr(top_rx, "code")
-            display = get_attr(top_rx, "display") or ""
-            short_display = display[:20] + "..." if len(display) > 20 else display
-
-            suggestions.append(cl.Action(
-                name="followup",
-                payload={"type": "other_strengths", "code": code, "display": display, "query": query},
-                label=f"Other forms of {short_display}",
-            ))
-            suggestions.append(cl.Action(
-                name="followup",
-                payload={"type": "diagnosis_for_drug", "display": display, "query": query},
-                label="What diagnosis supports this?",
-            ))
+    if top_rx := top_by_system.get("RxTerms"):
+        code = top_rx["code"]
+        display = top_rx["display"]
+        short_display = _truncate(display, 20)
+
+        suggestions.append(Action(
+            name="followup",
+            payload={"type": "other_strengths", "code": code, "display": display, "query": query},
+            label=f"Other forms of {short_display}",
+        ))
+        suggestions.append(Action(
+            name="followup",
+            payload={"type": "diagnosis_for_drug", "display": display, "query": query},
+            label="What diagnosis supports this?",
+        ))
+
+    # ICD-10 and RxTerms alone can fill the budget; skip building the rest
+    if len(suggestions) >= MAX_SUGGESTIONS:
+        return suggestions[:MAX_SUGGESTIONS]
 
     # LOINC follow-ups
-    if "LOINC" in systems_found:
-        top_loinc = next((r for r in results if get_attr(r, "system") == "LOINC"), None)
-        if top_loinc:
-            display = get_attr(top_loinc, "display") or ""
-
-            suggestions.append(cl.Action(
-                name="followup",
-                payload={"type": "loinc_unit", "display": display, "query": query},
-                label="What unit is this measured in?",
-            ))
+    if top_loinc := top_by_system.get("LOINC"):
+        display = top_loinc["display"]
+
+        suggestions.append(Action(
+            name="followup",
+            payload={"type": "loinc_unit", "display": display, "query": query},
+            label="What unit is this measured in?",
+        ))
 
     # HCPCS follow-ups
-    if "HCPCS" in systems_found:
-        top_hcpcs = next((r for r in results if get_attr(r, "system") == "HCPCS"), None)
-        if top_hcpcs:
-            code = get_attr(top_hcpcs, "code")
-
-            suggestions.append(cl.Action(
-                name="followup",
-                payload={"type": "hcpcs_diagnosis", "code": code, "query": query},
-                label="What diagnosis codes pair with this?",
-            ))
+    if top_hcpcs := top_by_system.get("HCPCS"):
+        code = top_hcpcs["code"]
 
-    return suggestions[:4]  # Max 4 suggestions
+        suggestions.append(Action(
+            name="followup",
+            payload={"type": "hcpcs_diagnosis", "code": code, "query": query},
+            label="What diagnosis codes pair with this?",
+        ))
 
+    return suggestions[:MAX_SUGGESTIONS]
 
-def get_bundle_actions(results: list) -> list[cl.Action]:
-    """Generate 'Add to bundle' buttons for top results from each system."""
-    actions = []
 
-    def get_attr(r, key):
-        if isinstance(r, dict):
-            return r.get(key)
-        return getattr(r, key, None)
+def get_bundle_actions(results: list, limit: int = 3) -> list[cl.Action]:
+    """Generate up to limit 'Add to bundle' buttons for top results from each system."""
+    Action = cl.Action  # Local binding for the repeated constructor calls
+    actions = []
 
     # Get top result from each system
     seen_systems = set()
     for r in results:
-        system = get_attr(r, "system")
+        system = r["system"]
         if system and system not in seen_systems:
             seen_systems.add(system)
-            code = get_attr(r, "code")
-            display = get_attr(r, "display") or ""
-            short_display = display[:20] + "..." if len(display) > 20 else display
+            code = r["code"]
+            display = r["display"]
 
-            actions.append(cl.Action(
+            actions.append(Action(
                 name="add_to_bundle",
                 payload={"system": system, "code": code, "display": display},
                 label=f"Add {code} to bundle",
             ))
 
-            if len(actions) >= 3:  # Max 3 add-to-bundle buttons
+            if len(actions) >= limit:
                 break
 
     return actions
 
 
+def export_csv_action() -> cl.Action:
+    """Build the 'Export to CSV' button (a fresh instance, since sending binds it to a message)."""
+    return cl.Action(name="export_csv", payload={}, label="Export to CSV")
+
+
+def get_result_actions(results: list, query: str, bundle_size: int) -> list[cl.Action]:
+    """
+    Build the buttons for a results message within the MAX_ACTIONS budget.
+
+    Follow-up suggestions come first, then add-to-bundle buttons, export,
+    and a bundle view when the bundle is non-empty. Buttons past the budget
+    are never built.
+
+    Args:
+        results: Normalized results shown in the message
+        query: The user's query
+        bundle_size: Number of codes in the user's bundle
+
+    Returns:
+        At most MAX_ACTIONS actions.
+    """
+    if not results:
+        return []
+
+    actions = get_follow_up_suggestions(results, query)
+    if len(actions) < MAX_ACTIONS:
+        actions.extend(get_bundle_actions(results, limit=min(3, MAX_ACTIONS - len(actions))))
+    if len(actions) < MAX_ACTIONS:
+        actions.append(export_csv_action())
+    if bundle_size and len(actions) < MAX_ACTIONS:
+        actions.append(cl.Action(
+            name="view_bundle",
+            payload={},
+            label=f"View bundle ({bundle_size})",
+        ))
+    return actions
+
+
 def format_empty_results(query: str, systems_searched: list) -> str:
     """Format a helpful message when no results are found."""
     systems_str = ", ".join(systems_searched) if systems_searched else "all systems"
@@ -196,35 +396,32 @@ def format_results(
     if not results:
         return format_empty_results(query, systems_searched or [])
 
-    def get_attr(r, key):
-        if isinstance(r, dict):
-            return r.get(key)
-        return getattr(r, key, None)
-
     # Group by system
-    by_system: dict[str, list] = {}
+    by_system: dict[str, list] = defaultdict(list)
     for r in results:
-        system = get_attr(r, "system") or "Unknown"
-        if system not in by_system:
-            by_system[system] = []
-        by_system[system].append(r)
+        by_system[r["system"] or "Unknown"].append(r)
 
     output = []
-    # Sort systems by result count (most results first)
-    sorted_systems = sorted(by_system.items(), key=lambda x: len(x[1]), reverse=True)
+    # Sort systems by result count (most results first). Plain tuples compare
+    # without a key callback; the position keeps ties in first-seen order.
+    sorted_systems = sorted(
+        (-len(items), pos, system, items)
+        for pos, (system, items) in enumerate(by_system.items())
+    )
 
-    for idx, (system, items) in enumerate(sorted_systems):
+    for _, _, system, items in sorted_systems:
         output.append(f"\n\n### {system} ({len(items)} results)")
         for r in items:
-            code = get_attr(r, "code")
-            display = get_attr(r, "display")
-            confidence = get_attr(r, "confidence") or 0.0
+            code = r["code"]
+            display = r["display"]
+            confidence = r["confidence"]
             badge = get_confidence_badge(confidence)
 
-            result_line = f"\n- `{code}` **{display}** {badge}"
+            # Fragments go straight into output; one join at the end builds the string
+            output.append(f"\n- `{code}` **{display}** {badge}")
 
             # Show system-specific metadata if available
-            metadata = get_attr(r, "metadata") or {}
+            metadata = r["metadata"]
             if metadata:
                 meta_parts = []
                 # LOINC metadata
@@ -240,9 +437,7 @@ def format_results(
                     defn = metadata.get("definition")
                     if defn:
                         # Truncate long definitions
-                        defn_text = defn[0] if isinstance(defn, list) else defn
-                        if len(defn_text) > 100:
-                            defn_text = defn_text[:100] + "..."
+                        defn_text = _truncate(defn[0] if isinstance(defn, list) else defn, 100)
                         meta_parts.append(f"Definition: {defn_text}")
                 # RxTerms metadata
                 elif system == "RxTerms":
@@ -253,7 +448,7 @@ def format_results(
                         meta_parts.append(f"Forms: {forms}")
 
                 if meta_parts:
-                    result_line += f"\n  - *{' | '.join(meta_parts)}*"
+                    output.append(f"\n  - *{' | '.join(meta_parts)}*")
 
             # Show hierarchy if enabled and available
             if show_hierarchy and hierarchy_info and code in hierarchy_info:
@@ -261,43 +456,117 @@ def format_results(
                 parent_code = parent.get("parent_code")
                 parent_display = parent.get("parent_display")
                 if parent_code and parent_display:
-                    result_line += f"\n  - > Parent: `{parent_code}` {parent_display}"
-
-            output.append(result_line)
+                    output.append(f"\n  - > Parent: `{parent_code}` {parent_display}")
 
     return "".join(output)
 
 
-def generate_csv(results: list, query: str) -> str:
-    """Generate CSV content from results."""
-    output = io.StringIO()
+# Divides the summary, results, and search footer of an agent answer
+_SEPARATOR = "\n\n---\n"
+
+
+def format_agent_output(
+    final_state: dict,
+    results: list[dict],
+    query: str,
+    show_hierarchy: bool,
+    multi_hop_enabled: bool,
+) -> str:
+    """Compose the summary, results, expansion note, and search footer for an agent run."""
+    summary = final_state.get("summary", "Search completed.")
+    related_terms = final_state.get("related_terms", [])
+    systems_searched = final_state.get("selected_systems", [])
+
+    parts = []
+
+    # Add LLM summary at the top if available
+    if summary and summary != "Search completed.":
+        parts.append(summary)
+        parts.append(_SEPARATOR)
+
+    # Add formatted results (this has percentage badges, metadata, etc.)
+    parts.append(format_results(
+        results, final_state.get("hierarchy_info", {}), show_hierarchy, query, systems_searched
+    ))
+
+    # Show multi-hop expansion info if used
+    if multi_hop_enabled and related_terms:
+        related_str = ", ".join(related_terms[:5])
+        more = f" (+{len(related_terms) - 5} more)" if len(related_terms) > 5 else ""
+        parts.append(f"\n\n**Multi-hop expansion**: Searched for related terms: {related_str}{more}")
+
+    # Add search details footer
+    if systems_searched:
+        search_terms_str = ", ".join(final_state.get("search_terms", [query])[:5])
+        systems_str = ", ".join(systems_searched)
+        parts.append(f"{_SEPARATOR}*Searched: {search_terms_str} across {systems_str}*")
+
+    return "".join(parts)
+
+
+def format_step_output(final_state: dict) -> str:
+    """Summarize an agent run for its Processing step, including the reasoning trace."""
+    results_count = len(final_state.get("consolidated_results", []))
+    reasoning_trace = final_state.get("reasoning_trace", [])
+    if reasoning_trace:
+        trace_text = "\n".join(f"• {step}" for step in reasoning_trace)
+        return f"Found {results_count} results\n\n**How we found these:**\n{trace_text}"
+    return f"Found {results_count} results"
+
+
+async def send_agent_answer(
+    final_state: dict,
+    query: str,
+    show_hierarchy: bool,
+    multi_hop_enabled: bool,
+) -> None:
+    """Send an agent run's results with their buttons and keep them for CSV export."""
+    session = cl.user_session
+    results = normalize_results(final_state.get("consolidated_results", []))
+
+    # Store results for export
+    session.set("last_results", results)
+    session.set("last_query", query)
+
+    output = format_agent_output(final_state, results, query, show_hierarchy, multi_hop_enabled)
+
+    actions = get_result_actions(results, query, len(session.get("code_bundle", [])))
+    await cl.Message(content=output, actions=actions).send()
+
+
+def generate_csv(results: list, query: str) -> bytes:
+    """Generate UTF-8 encoded CSV content from results."""
+    # Encode while writing so the export is not re-encoded as a whole afterwards
+    buffer = io.BytesIO()
+    output = io.TextIOWrapper(buffer, encoding="utf-8", newline="", write_through=True)
     writer = csv.writer(output)
 
     # Write header
     writer.writerow(["Code", "Display", "System", "Confidence", "Query"])
 
-    def get_attr(r, key):
-        if isinstance(r, dict):
-            return r.get(key)
-        return getattr(r, key, None)
-
-    for r in results:
-        writer.writerow([
-            _sanitize_csv_value(get_attr(r, "code") or ""),
-            _sanitize_csv_value(get_attr(r, "display") or ""),
-            _sanitize_csv_value(get_attr(r, "system") or ""),
-            f"{(get_attr(r, 'confidence') or 0.0):.2f}",
-            _sanitize_csv_value(query),
-        ])
+    # Query is the same on every row; sanitize it once
+    sanitized_query = _sanitize_csv_value(query)
+    writer.writerows(
+        (
+            _sanitize_csv_value(r["code"]),
+            _sanitize_csv_value(r["display"]),
+            _sanitize_csv_value(r["system"]),
+            f"{r['confidence']:.2f}",
+            sanitized_query,
+        )
+        for r in results
+    )
 
-    return output.getvalue()
+    output.flush()
+    return buffer.getvalue()
 
 
 @cl.action_callback("export_csv")
 async def on_export_csv(action: cl.Action):
     """Handle CSV export button click."""
-    results = cl.user_session.get("last_results", [])
-    query = cl.user_session.get("last_query", "search")
+    session = cl.user_session
+    results = session.get("last_results", [])
+    query = session.get("last_query", "search")
 
     if not results:
         await cl.Message(content="No results to export.").send()
@@ -306,13 +575,13 @@ async def on_export_csv(action: cl.Action):
     csv_content = generate_csv(results, query)
 
     # Create file element
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     filename = f"clinical_codes_{timestamp}.csv"
 
     elements = [
         cl.File(
             name=filename,
-            content=csv_content.encode("utf-8"),
+            content=csv_content,
             display="inline",
         )
     ]
@@ -323,284 +592,247 @@ async def on_export_csv(action: cl.Action):
     ).send()
 
 
-@cl.action_callback("followup")
-async def on_followup(action: cl.Action):
-    """Handle follow-up suggestion button clicks."""
-    followup_type = action.payload.get("type")
-    settings = cl.user_session.get("settings", {})
-    multi_hop_enabled = settings.get("multi_hop_enabled", False)
-    show_hierarchy = settings.get("show_hierarchy", True)
-
-    if followup_type == "meds_for_diagnosis":
-        # Search RxTerms for medications related to the diagnosis
-        display = action.payload.get("display", "")
-
-        # Extract meaningful medical term from the display
-        # Remove common ICD-10 prefixes that don't help with drug search
-        prefixes_to_strip = [
-            "family history of", "personal history of", "encounter for",
-            "screening for", "supervision of", "sequelae of", "other",
-            "unspecified", "type 1", "type 2", "with", "without",
-        ]
-        query_term = display.lower()
-        for prefix in prefixes_to_strip:
-            if query_term.startswith(prefix):
-                query_term = query_term[len(prefix):].strip()
-
-        # Also try to extract the core medical term (last significant words)
-        # e.g., "Family history of leukemia" → "leukemia"
-        words = query_term.split()
-        if len(words) > 3:
-            # Take last 2-3 meaningful words
-            query_term = " ".join(words[-2:])
-        elif not query_term:
-            # Fallback to original display
-            query_term = display
-
-        query = query_term.strip()
-
-        await cl.Message(content=f"Searching for medications to treat: **{query}**").send()
-
-        final_state = {}
-        async with cl.Step(name="Processing", type="tool") as parent_step:
-            parent_step.input = query
-
-            async for event in run_agent_streaming(
-                query,
-                multi_hop_enabled=True,  # Use multi-hop for better drug discovery
-                user_clarification="medication",
-            ):
-                for key, value in event["state"].items():
-                    if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                        final_state[key].extend(value)
-                    else:
-                        final_state[key] = value
-
-            results_count = len(final_state.get("consolidated_results", []))
-            parent_step.output = f"Found {results_count} medication results"
-
-        results = final_state.get("consolidated_results", [])
-        cl.user_session.set("last_results", results)
-        cl.user_session.set("last_query", query)
-
-        output = f"**Medications for: {query}**\n"
-        if not results:
-            output += f"\nNo medications found for '{query}'. This diagnosis may not have direct drug treatments, or try a more specific search term."
-        else:
-            output += format_results(results, {}, False, query, ["RxTerms"])
-
-        actions = get_follow_up_suggestions(results, query)
-        actions.extend(get_bundle_actions(results))
-        if results:
-            actions.append(cl.Action(name="export_csv", payload={}, label="Export to CSV"))
-
-        await cl.Message(content=output, actions=actions[:6]).send()
-
-    elif followup_type == "check_billable":
-        # Check if ICD-10 code is billable (specific enough)
-        import asyncio
-        code = action.payload.get("code", "")
-
-        # A code is billable if it's at maximum specificity
-        # ICD-10-CM billability rules:
-        # - Codes without decimals (3 chars) are category codes - NOT billable
-        # - Codes with decimals need to be at highest specificity available
-        has_decimal = "." in code
-        decimal_part = code.split(".")[-1] if has_decimal else ""
-
-        # Check code length pattern
-        if not has_decimal:
-            billable = False
-            message = f"**{code}** is a **category code** (not billable)\n\nCategory codes are too broad for billing. You need a more specific code with a decimal."
-        elif len(decimal_part) < 1:
-            billable = False
-            message = f"**{code}** needs **more specificity**\n\nAdd more digits after the decimal for billing."
-        else:
-            billable = True
-            message = f"**{code}** appears to be **billable** (has decimal specificity)"
-
-        # Try to fetch hierarchy info with timeout
-        try:
-            from src.agent.multi_hop import fetch_icd10_parent
-            hierarchy = await asyncio.wait_for(
-                fetch_icd10_parent(code),
-                timeout=5.0  # 5 second timeout
-            )
-            if hierarchy:
-                parent_code = hierarchy.get("parent_code")
-                parent_display = hierarchy.get("parent_display")
-                if parent_code:
-                    message += f"\n\n**Parent category**: `{parent_code}` {parent_display}"
-        except asyncio.TimeoutError:
-            message += "\n\n*(Hierarchy lookup timed out)*"
-        except Exception as e:
-            pass  # Silently ignore hierarchy errors
-
-        # Suggest searching for more specific codes
-        if not billable:
-            message += f"\n\n*Tip: Search for '{code}' to see more specific codes*"
-
-        await cl.Message(content=message).send()
-
-    elif followup_type == "other_strengths":
-        # Search for other forms/strengths of the same drug
-        display = action.payload.get("display", "")
-        # Extract drug name (usually first word or two)
-        drug_name = display.split()[0] if display else action.payload.get("query", "")
-
-        await cl.Message(content=f"Searching for other forms of: **{drug_name}**").send()
-
-        final_state = {}
-        async with cl.Step(name="Processing", type="tool") as parent_step:
-            parent_step.input = drug_name
-
-            async for event in run_agent_streaming(
-                drug_name,
-                multi_hop_enabled=False,
-                user_clarification="medication",
-            ):
-                for key, value in event["state"].items():
-                    if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                        final_state[key].extend(value)
-                    else:
-                        final_state[key] = value
-
-            results_count = len(final_state.get("consolidated_results", []))
-            parent_step.output = f"Found {results_count} results"
-
-        results = final_state.get("consolidated_results", [])
-        cl.user_session.set("last_results", results)
-        cl.user_session.set("last_query", drug_name)
-
-        output = f"**Forms and strengths of: {drug_name}**\n"
-        output += format_results(results, {}, False, drug_name, ["RxTerms"])
-
-        actions = get_bundle_actions(results)
-        if results:
-            actions.append(cl.Action(name="export_csv", payload={}, label="Export to CSV"))
+@dataclass(slots=True)
+class FollowupPlan:
+    """How to run and present one follow-up agent search."""
+
+    intro: str  # Message sent before the search starts
+    search_query: str  # Query passed to the agent
+    query: str  # Query shown in results, empty-state hints, and CSV export
+    multi_hop: bool
+    clarification: str  # Intent forced on the agent, skipping clarification
+    heading: str
+    systems: list[str]
+    result_label: str = "results"
+    empty_message: str | None = None  # Replaces the generic empty-results hint
+    remember: bool = True  # Store results for CSV export
+    with_actions: bool = True  # Bundle and export buttons
+    with_suggestions: bool = False  # Chained follow-up buttons
+    step_input: str | None = None  # Shown on the processing step; defaults to search_query
+
+
+def _drug_name(display: str) -> str:
+    """Extract the drug name (first word) from an RxTerms display string."""
+    return display.split()[0] if display else ""
+
+
+def _plan_meds_for_diagnosis(payload: dict) -> FollowupPlan:
+    """Search RxTerms for medications related to the diagnosis."""
+    display = payload.get("display", "")
+
+    # Extract meaningful medical term from the display
+    # Remove common ICD-10 prefixes that don't help with drug search
+    query_term = _ICD_PREFIX_RE.sub("", display).strip()
+
+    # Also try to extract the core medical term (last significant words)
+    # e.g., "Family history of leukemia" → "leukemia"
+    words = query_term.split()
+    if len(words) > 3:
+        # Take last 2-3 meaningful words
+        query_term = " ".join(words[-2:])
+    elif not query_term:
+        # Fallback to original display
+        query_term = display
+
+    query = query_term.strip()
+    return FollowupPlan(
+        intro=f"Searching for medications to treat: **{query}**",
+        search_query=query,
+        query=query,
+        multi_hop=True,  # Use multi-hop for better drug discovery
+        clarification="medication",
+        heading=f"**Medications for: {query}**\n",
+        systems=["RxTerms"],
+        result_label="medication results",
+        empty_message=f"\nNo medications found for '{query}'. This diagnosis may not have direct drug treatments, or try a more specific search term.",
+        with_suggestions=True,
+    )
 
-        await cl.Message(content=output, actions=actions).send()
 
-    elif followup_type == "diagnosis_for_drug":
-        # Search for diagnoses that support a drug
-        display = action.payload.get("display", "")
-        drug_name = display.split()[0] if display else ""
+def _plan_other_strengths(payload: dict) -> FollowupPlan:
+    """Search for other forms/strengths of the same drug."""
+    drug_name = _drug_name(payload.get("display", "")) or payload.get("query", "")
+    return FollowupPlan(
+        intro=f"Searching for other forms of: **{drug_name}**",
+        search_query=drug_name,
+        query=drug_name,
+        multi_hop=False,
+        clarification="medication",
+        heading=f"**Forms and strengths of: {drug_name}**\n",
+        systems=["RxTerms"],
+    )
 
-        await cl.Message(content=f"Searching for diagnoses related to: **{drug_name}**").send()
 
-        # Common drug-to-indication mappings (simplified)
-        query = f"{drug_name} indication diagnosis"
+def _plan_diagnosis_for_drug(payload: dict) -> FollowupPlan:
+    """Search for diagnoses that support a drug."""
+    drug_name = _drug_name(payload.get("display", ""))
+    # Common drug-to-indication mappings (simplified)
+    query = f"{drug_name} indication diagnosis"
+    return FollowupPlan(
+        intro=f"Searching for diagnoses related to: **{drug_name}**",
+        search_query=drug_name,
+        query=query,
+        multi_hop=True,  # Use multi-hop for drug→diagnosis
+        clarification="diagnosis",
+        heading=f"**Diagnoses related to: {drug_name}**\n",
+        systems=["ICD-10-CM"],
+        step_input=query,
+    )
 
-        final_state = {}
-        async with cl.Step(name="Processing", type="tool") as parent_step:
-            parent_step.input = query
 
-            async for event in run_agent_streaming(
-                drug_name,
-                multi_hop_enabled=True,  # Use multi-hop for drug→diagnosis
-                user_clarification="diagnosis",
-            ):
-                for key, value in event["state"].items():
-                    if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                        final_state[key].extend(value)
-                    else:
-                        final_state[key] = value
-
-            results_count = len(final_state.get("consolidated_results", []))
-            parent_step.output = f"Found {results_count} results"
+def _plan_loinc_unit(payload: dict) -> FollowupPlan:
+    """Search for UCUM units related to the LOINC test."""
+    display = payload.get("display", "")
+    query = payload.get("query", display)
+    return FollowupPlan(
+        intro=f"Searching for units related to: **{display}**",
+        search_query=f"{query} unit",
+        query=query,
+        multi_hop=False,
+        clarification="units",
+        heading=f"**Units for: {display}**\n",
+        systems=["UCUM"],
+        remember=False,
+        with_actions=False,
+    )
 
-        results = final_state.get("consolidated_results", [])
-        cl.user_session.set("last_results", results)
-        cl.user_session.set("last_query", query)
 
-        output = f"**Diagnoses related to: {drug_name}**\n"
-        output += format_results(results, {}, False, query, ["ICD-10-CM"])
+def _plan_hcpcs_diagnosis(payload: dict) -> FollowupPlan:
+    """Search for ICD-10 codes that pair with HCPCS."""
+    code = payload.get("code", "")
+    query = payload.get("query", "")
+    return FollowupPlan(
+        intro=f"Searching for diagnoses that pair with **{code}**...",
+        search_query=query,
+        query=query,
+        multi_hop=True,
+        clarification="diagnosis",
+        heading=f"**Diagnoses that pair with {code}**\n",
+        systems=["ICD-10-CM"],
+    )
 
-        actions = get_bundle_actions(results)
-        if results:
-            actions.append(cl.Action(name="export_csv", payload={}, label="Export to CSV"))
 
-        await cl.Message(content=output, actions=actions).send()
+# Follow-up type -> builder of the agent search it runs
+_FOLLOWUP_PLANS = {
+    "meds_for_diagnosis": _plan_meds_for_diagnosis,
+    "other_strengths": _plan_other_strengths,
+    "diagnosis_for_drug": _plan_diagnosis_for_drug,
+    "loinc_unit": _plan_loinc_unit,
+    "hcpcs_diagnosis": _plan_hcpcs_diagnosis,
+}
 
-    elif followup_type == "loinc_unit":
-        # Search for UCUM units related to the LOINC test
-        display = action.payload.get("display", "")
-        query = action.payload.get("query", display)
 
-        await cl.Message(content=f"Searching for units related to: **{display}**").send()
+async def run_followup(plan: FollowupPlan) -> None:
+    """Run a follow-up agent search and send the formatted results."""
+    await cl.Message(content=plan.intro).send()
 
-        final_state = {}
-        async with cl.Step(name="Processing", type="tool") as parent_step:
-            parent_step.input = f"{query} unit"
+    final_state = {}
+    async with cl.Step(name="Processing", type="tool") as parent_step:
+        parent_step.input = plan.step_input or plan.search_query
 
+        deltas = [
+            event["state"]
             async for event in run_agent_streaming(
-                f"{query} unit",
-                multi_hop_enabled=False,
-                user_clarification="units",
-            ):
-                for key, value in event["state"].items():
-                    if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                        final_state[key].extend(value)
-                    else:
-                        final_state[key] = value
+                plan.search_query,
+                multi_hop_enabled=plan.multi_hop,
+                user_clarification=plan.clarification,
+            )
+        ]
+        final_state = merge_state_deltas(deltas)
 
-            results_count = len(final_state.get("consolidated_results", []))
-            parent_step.output = f"Found {results_count} results"
+        results_count = len(final_state.get("consolidated_results", []))
+        parent_step.output = f"Found {results_count} {plan.result_label}"
 
-        results = final_state.get("consolidated_results", [])
+    results = normalize_results(final_state.get("consolidated_results", []))
+    if plan.remember:
+        session = cl.user_session
+        session.set("last_results", results)
+        session.set("last_query", plan.query)
 
-        output = f"**Units for: {display}**\n"
-        output += format_results(results, {}, False, query, ["UCUM"])
+    output = plan.heading
+    if not results and plan.empty_message:
+        output += plan.empty_message
+    else:
+        output += format_results(results, {}, False, plan.query, plan.systems)
 
+    if not plan.with_actions:
         await cl.Message(content=output).send()
+        return
 
-    elif followup_type == "hcpcs_diagnosis":
-        # Search for ICD-10 codes that pair with HCPCS
-        code = action.payload.get("code", "")
-        query = action.payload.get("query", "")
-
-        await cl.Message(content=f"Searching for diagnoses that pair with **{code}**...").send()
-
-        final_state = {}
-        async with cl.Step(name="Processing", type="tool") as parent_step:
-            parent_step.input = query
+    actions = get_follow_up_suggestions(results, plan.query) if plan.with_suggestions else []
+    actions.extend(get_bundle_actions(results))
+    if results:
+        actions.append(export_csv_action())
+
+    await cl.Message(content=output, actions=actions[:6]).send()
+
+
+async def check_billable(code: str) -> None:
+    """Report whether an ICD-10-CM code is specific enough to bill."""
+    # A code is billable if it's at maximum specificity
+    # ICD-10-CM billability rules:
+    # - Codes without decimals (3 chars) are category codes - NOT billable
+    # - Codes with decimals need to be at highest specificity available
+    has_decimal = "." in code
+    decimal_part = code.split(".")[-1] if has_decimal else ""
+
+    # Check code length pattern
+    if not has_decimal:
+        billable = False
+        message = f"**{code}** is a **category code** (not billable)\n\nCategory codes are too broad for billing. You need a more specific code with a decimal."
+    elif len(decimal_part) < 1:
+        billable = False
+        message = f"**{code}** needs **more specificity**\n\nAdd more digits after the decimal for billing."
+    else:
+        billable = True
+        message = f"**{code}** appears to be **billable** (has decimal specificity)"
+
+    # Try to fetch hierarchy info with timeout
+    try:
+        hierarchy = await asyncio.wait_for(
+            fetch_hierarchy(code, "ICD-10-CM"),
+            timeout=5.0  # 5 second timeout
+        )
+        if hierarchy:
+            parent_code = hierarchy.get("parent_code")
+            parent_display = hierarchy.get("parent_display")
+            if parent_code:
+                message += f"\n\n**Parent category**: `{parent_code}` {parent_display}"
+    except asyncio.TimeoutError:
+        message += "\n\n*(Hierarchy lookup timed out)*"
+    except Exception:
+        pass  # Silently ignore hierarchy errors
 
-            async for event in run_agent_streaming(
-                query,
-                multi_hop_enabled=True,
-                user_clarification="diagnosis",
-            ):
-                for key, value in event["state"].items():
-                    if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                        final_state[key].extend(value)
-                    else:
-                        final_state[key] = value
+    # Suggest searching for more specific codes
+    if not billable:
+        message += f"\n\n*Tip: Search for '{code}' to see more specific codes*"
 
-            results_count = len(final_state.get("consolidated_results", []))
-            parent_step.output = f"Found {results_count} results"
+    await cl.Message(content=message).send()
 
-        results = final_state.get("consolidated_results", [])
-        cl.user_session.set("last_results", results)
-        cl.user_session.set("last_query", query)
 
-        output = f"**Diagnoses that pair with {code}**\n"
-        output += format_results(results, {}, False, query, ["ICD-10-CM"])
+@cl.action_callback("followup")
+async def on_followup(action: cl.Action):
+    """Handle follow-up suggestion button clicks."""
+    followup_type = action.payload.get("type")
 
-        actions = get_bundle_actions(results)
-        if results:
-            actions.append(cl.Action(name="export_csv", payload={}, label="Export to CSV"))
+    if followup_type == "check_billable":
+        await check_billable(action.payload.get("code", ""))
+        return
 
-        await cl.Message(content=output, actions=actions).send()
+    build_plan = _FOLLOWUP_PLANS.get(followup_type)
+    if build_plan is not None:
+        await run_followup(build_plan(action.payload))
 
 
 @cl.action_callback("add_to_bundle")
 async def on_add_to_bundle(action: cl.Action):
     """Handle adding a code to the user's bundle - compact notification."""
+    session = cl.user_session
     system = action.payload.get("system", "")
     code = action.payload.get("code", "")
     display = action.payload.get("display", "")
 
-    bundle = cl.user_session.get("code_bundle", [])
+    bundle = session.get("code_bundle", [])
 
     # Check if already in bundle
     for item in bundle:
@@ -610,7 +842,7 @@ async def on_add_to_bundle(action: cl.Action):
 
     # Add to bundle
     bundle.append({"system": system, "code": code, "display": display})
-    cl.user_session.set("code_bundle", bundle)
+    session.set("code_bundle", bundle)
 
     # Compact inline confirmation with quick actions
     codes_list = ", ".join([f"`{b['code']}`" for b in bundle])
@@ -637,8 +869,7 @@ async def on_view_bundle(action: cl.Action):
     # Compact single-line format
     lines = [f"**Code Bundle** ({len(bundle)} codes):"]
     for item in bundle:
-        short_display = item['display'][:40] + "..." if len(item['display']) > 40 else item['display']
-        lines.append(f"- `{item['code']}` ({item['system']}): {short_display}")
+        lines.append(f"- `{item['code']}` ({item['system']}): {_truncate(item['display'], 40)}")
 
     actions = [
         cl.Action(name="export_bundle", payload={}, label="Export CSV"),
@@ -657,24 +888,21 @@ async def on_export_bundle(action: cl.Action):
         await cl.Message(content="Bundle is empty").send()
         return
 
-    # Generate CSV
-    csv_output = io.StringIO()
-    writer = csv.writer(csv_output)
-    writer.writerow(["Code", "System", "Display"])
-    for item in bundle:
-        writer.writerow([
-            _sanitize_csv_value(item["code"]),
-            _sanitize_csv_value(item["system"]),
-            _sanitize_csv_value(item["display"]),
-        ])
+    # Generate CSV; the bundle is small, so build the text directly
+    rows = ["Code,System,Display"]
+    rows.extend(
+        f'{_csv_field(item["code"])},{_csv_field(item["system"])},{_csv_field(item["display"])}'
+        for item in bundle
+    )
+    csv_bytes = ("\r\n".join(rows) + "\r\n").encode("utf-8")
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
     filename = f"code_bundle_{timestamp}.csv"
 
     elements = [
         cl.File(
             name=filename,
-            content=csv_output.getvalue().encode("utf-8"),
+            content=csv_bytes,
             display="inline",
         )
     ]
@@ -692,9 +920,23 @@ async def on_clear_bundle(action: cl.Action):
     await cl.Message(content="Bundle cleared.").send()
 
 
+# Shown at the start of every chat session
+WELCOME_MESSAGE = (
+    "## What clinical code are you looking for?\n\n"
+    "Search across **ICD-10-CM**, **LOINC**, **RxTerms**, **HCPCS**, **UCUM**, and **HPO**.\n\n"
+    "Try queries like:\n"
+    "- `diabetes` - diagnosis codes\n"
+    "- `glucose test` - lab test codes\n"
+    "- `metformin 500 mg` - medication codes\n"
+    "- `wheelchair` - supply/service codes\n\n"
+    "*Tip: Try an ambiguous query like `iron` to see clarification in action.*"
+)
+
+
 @cl.on_chat_start
 async def on_start():
     """Initialize chat session with welcome message and settings."""
+    session = cl.user_session
     # Set default settings with helpful descriptions
     settings = await cl.ChatSettings([
         cl.input_widget.Switch(
@@ -717,19 +959,13 @@ async def on_start():
         ),
     ]).send()
 
-    cl.user_session.set("settings", settings)
+    session.set("settings", settings)
 
-    # Welcome message
-    await cl.Message(
-        content="## What clinical code are you looking for?\n\n"
-                "Search across **ICD-10-CM**, **LOINC**, **RxTerms**, **HCPCS**, **UCUM**, and **HPO**.\n\n"
-                "Try queries like:\n"
-                "- `diabetes` - diagnosis codes\n"
-                "- `glucose test` - lab test codes\n"
-                "- `metformin 500 mg` - medication codes\n"
-                "- `wheelchair` - supply/service codes\n\n"
-                "*Tip: Try an ambiguous query like `iron` to see clarification in action.*"
-    ).send()
+    # Open the API connection while the user reads the welcome message
+    manager = await HTTPClientManager.get_instance()
+    session.set("warmup_task", asyncio.create_task(manager.warmup()))
+
+    await cl.Message(content=WELCOME_MESSAGE).send()
 
 
 @cl.on_settings_update
@@ -748,102 +984,43 @@ async def on_message(message: cl.Message):
     show_hierarchy = settings.get("show_hierarchy", True)
 
     final_state = {}
+    cache_key = _agent_state_key(query, multi_hop_enabled)
+    cached_state = await _agent_state_cache.get(cache_key) if config.CACHE_ENABLED else None
 
     # Use Steps for streaming visualization
     async with cl.Step(name="Processing", type="tool") as parent_step:
         parent_step.input = query
 
-        async for event in run_agent_streaming(
-            query,
-            multi_hop_enabled=multi_hop_enabled,
-        ):
-            node = event["node"]
-            state_update = event["state"]
-
-            # Merge state into final state (append lists instead of replacing)
-            for key, value in state_update.items():
-                if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                    final_state[key].extend(value)
-                else:
-                    final_state[key] = value
+        if cached_state is not None:
+            final_state = cached_state
+        else:
+            deltas = [
+                event["state"]
+                async for event in run_agent_streaming(
+                    query,
+                    multi_hop_enabled=multi_hop_enabled,
+                )
+            ]
+            final_state = merge_state_deltas(deltas)
+
+            # Only cache runs that produced something (empty may be a transient API failure)
+            if config.CACHE_ENABLED and (
+                final_state.get("consolidated_results") or final_state.get("clarification_needed")
+            ):
+                await _agent_state_cache.set(cache_key, slim_state(final_state), config.CACHE_TTL)
 
         # Set parent step output with reasoning trace
-        results_count = len(final_state.get("consolidated_results", []))
-        reasoning_trace = final_state.get("reasoning_trace", [])
-        if reasoning_trace:
-            trace_text = "\n".join(f"• {step}" for step in reasoning_trace)
-            parent_step.output = f"Found {results_count} results\n\n**How we found these:**\n{trace_text}"
-        else:
-            parent_step.output = f"Found {results_count} results"
+        parent_step.output = format_step_output(final_state)
+        if cached_state is not None:
+            # The trace is from the earlier run; say so instead of implying a fresh search
+            parent_step.output = f"{CACHE_HIT_NOTE}\n\n{parent_step.output}"
 
     # Check if clarification is needed
     if settings.get("clarification_enabled", True) and final_state.get("clarification_needed"):
         await handle_clarification_request(query, final_state)
         return
 
-    # Format and display final results
-    summary = final_state.get("summary", "Search completed.")
-    results = final_state.get("consolidated_results", [])
-    hierarchy_info = final_state.get("hierarchy_info", {})
-    related_terms = final_state.get("related_terms", [])
-    systems_searched = final_state.get("selected_systems", [])
-
-    # Store results for export
-    cl.user_session.set("last_results", results)
-    cl.user_session.set("last_query", query)
-
-    # Build output message
-    output_parts = []
-
-    # Add LLM summary at the top if available
-    if summary and summary != "Search completed.":
-        output_parts.append(summary)
-        output_parts.append("\n\n---\n")  # Separator
-
-    # Add formatted results (this has percentage badges, metadata, etc.)
-    output_parts.append(format_results(results, hierarchy_info, show_hierarchy, query, systems_searched))
-
-    # Show multi-hop expansion info if used
-    if multi_hop_enabled and related_terms:
-        output_parts.append(f"\n\n**Multi-hop expansion**: Searched for related terms: {', '.join(related_terms[:5])}")
-        if len(related_terms) > 5:
-            output_parts.append(f" (+{len(related_terms)-5} more)")
-
-    # Add search details footer
-    search_terms = final_state.get("search_terms", [query])
-    if systems_searched:
-        output_parts.append(f"\n\n---\n*Searched: {', '.join(search_terms[:5])} across {', '.join(systems_searched)}*")
-
-    # Create actions: follow-up suggestions + bundle + export
-    actions = []
-    if results:
-        # Add follow-up suggestions based on results
-        actions.extend(get_follow_up_suggestions(results, query))
-
-        # Add bundle actions (top result from each system)
-        actions.extend(get_bundle_actions(results))
-
-        # Add export action
-        actions.append(
-            cl.Action(
-                name="export_csv",
-                payload={},
-                label="Export to CSV",
-            )
-        )
-
-        # Show bundle status if user has codes in bundle
-        bundle = cl.user_session.get("code_bundle", [])
-        if bundle:
-            actions.append(
-                cl.Action(
-                    name="view_bundle",
-                    payload={},
-                    label=f"View bundle ({len(bundle)})",
-                )
-            )
-
-    await cl.Message(content="".join(output_parts), actions=actions[:8]).send()
+    await send_agent_answer(final_state, query, show_hierarchy, multi_hop_enabled)
 
 
 async def handle_clarification_request(query: str, state: dict):
@@ -879,6 +1056,18 @@ async def handle_clarification_request(query: str, state: dict):
     ).send()
 
 
+# How each clarification intent is described back to the user
+INTENT_LABELS = {
+    "diagnosis": "diagnosis codes",
+    "laboratory": "lab test codes",
+    "medication": "medication codes",
+    "supplies": "supply/service codes",
+    "units": "unit codes",
+    "phenotype": "phenotype codes",
+    "all": "all relevant systems",
+}
+
+
 @cl.action_callback("clarify")
 async def on_clarify(action: cl.Action):
     """Handle clarification button clicks."""
@@ -890,16 +1079,7 @@ async def on_clarify(action: cl.Action):
     show_hierarchy = settings.get("show_hierarchy", True)
 
     # Show user's choice
-    intent_labels = {
-        "diagnosis": "diagnosis codes",
-        "laboratory": "lab test codes",
-        "medication": "medication codes",
-        "supplies": "supply/service codes",
-        "units": "unit codes",
-        "phenotype": "phenotype codes",
-        "all": "all relevant systems",
-    }
-    await cl.Message(content=f"Searching for {intent_labels.get(intent, intent)}...").send()
+    await cl.Message(content=f"Searching for {INTENT_LABELS.get(intent, intent)}...").send()
 
     final_state = {}
 
@@ -907,87 +1087,17 @@ async def on_clarify(action: cl.Action):
     async with cl.Step(name="Processing", type="tool") as parent_step:
         parent_step.input = f"{query} (clarified: {intent})"
 
-        async for event in run_agent_streaming(
-            query,
-            multi_hop_enabled=multi_hop_enabled,
-            user_clarification=intent,
-        ):
-            node = event["node"]
-            state_update = event["state"]
-
-            # Merge state into final state (append lists instead of replacing)
-            for key, value in state_update.items():
-                if key in final_state and isinstance(final_state[key], list) and isinstance(value, list):
-                    final_state[key].extend(value)
-                else:
-                    final_state[key] = value
-
-        # Set parent step output with reasoning trace
-        results_count = len(final_state.get("consolidated_results", []))
-        reasoning_trace = final_state.get("reasoning_trace", [])
-        if reasoning_trace:
-            trace_text = "\n".join(f"• {step}" for step in reasoning_trace)
-            parent_step.output = f"Found {results_count} results\n\n**How we found these:**\n{trace_text}"
-        else:
-            parent_step.output = f"Found {results_count} results"
-
-    # Format and display final results
-    summary = final_state.get("summary", "Search completed.")
-    results = final_state.get("consolidated_results", [])
-    hierarchy_info = final_state.get("hierarchy_info", {})
-    related_terms = final_state.get("related_terms", [])
-    systems_searched = final_state.get("selected_systems", [])
-
-    # Store results for export
-    cl.user_session.set("last_results", results)
-    cl.user_session.set("last_query", query)
-
-    # Build output message
-    output_parts = []
-
-    # Add LLM summary at the top if available
-    if summary and summary != "Search completed.":
-        output_parts.append(summary)
-        output_parts.append("\n\n---\n")  # Separator
-
-    # Add formatted results (this has percentage badges, metadata, etc.)
-    output_parts.append(format_results(results, hierarchy_info, show_hierarchy, query, systems_searched))
-
-    if multi_hop_enabled and related_terms:
-        output_parts.append(f"\n\n**Multi-hop expansion**: Searched for related terms: {', '.join(related_terms[:5])}")
-
-    # Add search details footer
-    search_terms = final_state.get("search_terms", [query])
-    if systems_searched:
-        output_parts.append(f"\n\n---\n*Searched: {', '.join(search_terms[:5])} across {', '.join(systems_searched)}*")
-
-    # Create actions: follow-up suggestions + bundle + export
-    actions = []
-    if results:
-        # Add follow-up suggestions based on results
-        actions.extend(get_follow_up_suggestions(results, query))
-
-        # Add bundle actions (top result from each system)
-        actions.extend(get_bundle_actions(results))
-
-        # Add export action
-        actions.append(
-            cl.Action(
-                name="export_csv",
-                payload={},
-                label="Export to CSV",
+        deltas = [
+            event["state"]
+            async for event in run_agent_streaming(
+                query,
+                multi_hop_enabled=multi_hop_enabled,
+                user_clarification=intent,
             )
-        )
+        ]
+        final_state = merge_state_deltas(deltas)
 
-        # Show bundle status if user has codes in bundle
-        bundle = cl.user_session.get("code_bundle", [])
-        if bundle:
-            actions.append(
-                cl.Action(
-                    name="view_bundle",
-                    payload={},
-                    label=f"View bundle ({len(bundle)})",
-                )
-            )
+        # Set parent step output with reasoning trace
+        parent_step.output = format_step_output(final_state)
 
-    await cl.Message(content="".join(output_parts), actions=actions[:8]).send()
+    await send_agent_answer(final_state, query, show_hierarchy, multi_hop_enabled)
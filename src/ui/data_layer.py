@@ -1,11 +1,14 @@
 # ABOUTME: File-based data persistence layer for Chainlit.
-# ABOUTME: Stores threads and messages in a local JSON file for demo purposes.
+# ABOUTME: Stores users, threads, steps, and elements in local JSON files for demo purposes.
 
-import json
+import asyncio
+import atexit
 import os
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
+
+import orjson
 from chainlit.data import BaseDataLayer
 from chainlit.types import (
     Feedback,
@@ -21,7 +24,20 @@ from chainlit.element import ElementDict
 
 
 DATA_DIR = Path.home() / ".clinical_codes_finder"
-THREADS_FILE = DATA_DIR / "threads.json"
+# Each data section is its own JSON file, so a lookup parses only the slice it needs
+_SECTIONS = ("users", "threads", "steps", "elements")
+SECTION_FILES = {name: DATA_DIR / f"{name}.json" for name in _SECTIONS}
+# Before sections were split, threads.json held all four of them
+THREADS_FILE = SECTION_FILES["threads"]
+# Append-only change logs for the high-churn sections, replayed over their files
+STEPS_LOG = DATA_DIR / "steps.jsonl"
+ELEMENTS_LOG = DATA_DIR / "elements.jsonl"
+_LOGS = {"steps": STEPS_LOG, "elements": ELEMENTS_LOG}
+
+
+def _dumps(obj) -> bytes:
+    """Serialize to compact JSON, stringifying anything orjson can't encode natively."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS)
 
 
 def _ensure_data_dir():
@@ -29,23 +45,256 @@ def _ensure_data_dir():
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _load_data() -> dict:
-    """Load data from the JSON file."""
-    _ensure_data_dir()
-    if THREADS_FILE.exists():
-        try:
-            with open(THREADS_FILE, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return {"users": {}, "threads": {}, "steps": {}, "elements": {}}
-    return {"users": {}, "threads": {}, "steps": {}, "elements": {}}
+# Seconds to wait before writing, so a burst of thread updates costs one write
+SAVE_DELAY = 0.2
+# Fold a change log back into its section file once it holds this many records
+LOG_COMPACT_RECORDS = 500
+
+
+class _LazyData(dict):
+    """Data sections by name, each parsed from its own file on first access."""
+
+    def __missing__(self, section: str) -> dict:
+        if section not in SECTION_FILES:
+            raise KeyError(section)
+        items = {}
+        if SECTION_FILES[section].exists():
+            try:
+                items = orjson.loads(SECTION_FILES[section].read_bytes())
+            except (orjson.JSONDecodeError, OSError):
+                pass
+        _install_section(self, section, items)
+        return items
+
+
+# Parsed sections; each is reused while its files' mtimes are unchanged
+_cache: _LazyData | None = None
+_signatures: dict[str, tuple[int | None, int | None]] = {}
+# Sections holding changes not yet written to their files
+_dirty_sections: set[str] = set()
+_flush_task: asyncio.Task | None = None
+# Records currently in each change log
+_log_records = {name: 0 for name in _LOGS}
+# Per-section index of item IDs by threadId (insertion-ordered dict as a set),
+# rebuilt whenever the section is loaded
+_by_thread: dict[str, dict[str | None, dict[str, None]]] = {"steps": {}, "elements": {}}
+# Thread IDs newest-first plus each ID's position, per userId filter (None = all
+# users). Built on first listing and dropped whenever threads are added,
+# removed, or reassigned.
+_thread_views: dict[str | None, tuple[list[str], dict[str, int]]] = {}
+
+
+def _mtime_ns(path: Path) -> int | None:
+    """Return a file's mtime in nanoseconds, or None if it is missing."""
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
 
 
-def _save_data(data: dict):
-    """Save data to the JSON file."""
+def _section_signature(section: str) -> tuple[int | None, int | None]:
+    """Return the mtimes of a section's file and change log, used to detect outside changes."""
+    log = _LOGS.get(section)
+    return (_mtime_ns(SECTION_FILES[section]), _mtime_ns(log) if log else None)
+
+
+def _replay_log(section: dict, path: Path) -> int:
+    """Apply a change log to a data section (last write wins) and return its record count."""
+    count = 0
+    size = 0
+    unterminated = False
+    torn_at: int | None = None
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                start, size = size, size + len(line)
+                unterminated = not line.endswith(b"\n")
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    if unterminated:
+                        torn_at = start  # Torn final line from an interrupted append
+                    continue
+                count += 1
+                if record["data"] is None:
+                    section.pop(record["id"], None)
+                else:
+                    section[record["id"]] = record["data"]
+    except FileNotFoundError:
+        return 0
+    # Repair the tail so the next append starts on its own line instead of
+    # being glued onto a partial record
+    if torn_at is not None:
+        os.truncate(path, torn_at)
+    elif unterminated:
+        with open(path, "ab") as log:
+            log.write(b"\n")
+    return count
+
+
+def _install_section(data: dict, section: str, items: dict):
+    """Put freshly read section items in the cache and rebuild what derives from them."""
+    signature = _section_signature(section)
+    if section in _LOGS:
+        _log_records[section] = _replay_log(items, _LOGS[section])
+        _by_thread[section] = _build_thread_index(items)
+    elif section == "threads":
+        _thread_views.clear()
+    data[section] = items
+    _signatures[section] = signature
+
+
+def _build_thread_index(section: dict) -> dict[str | None, dict[str, None]]:
+    """Group a section's item IDs by threadId."""
+    index: dict[str | None, dict[str, None]] = {}
+    for item_id, item in section.items():
+        index.setdefault(item.get("threadId"), {})[item_id] = None
+    return index
+
+
+def _index_add(section: str, item_id: str, thread_id: str | None):
+    """Record an item under its thread in the section's index."""
+    _by_thread[section].setdefault(thread_id, {})[item_id] = None
+
+
+def _index_remove(section: str, item_id: str, thread_id: str | None):
+    """Drop an item from its thread in the section's index."""
+    ids = _by_thread[section].get(thread_id)
+    if ids is not None:
+        ids.pop(item_id, None)
+
+
+def _store_item(data: dict, section: str, item_id: str, item: dict):
+    """Insert or replace an item, keeping the thread index in step."""
+    old = data[section].get(item_id)
+    data[section][item_id] = item
+    if old is None or old.get("threadId") != item.get("threadId"):
+        if old is not None:
+            _index_remove(section, item_id, old.get("threadId"))
+        _index_add(section, item_id, item.get("threadId"))
+
+
+def _thread_items(data: dict, section: str, thread_id: str) -> list[dict]:
+    """Return a thread's steps or elements via the index, without scanning the section."""
+    items = data[section]
+    return [items[item_id] for item_id in _by_thread[section].get(thread_id, ())]
+
+
+def _thread_view(data: dict, user_id: str | None) -> tuple[list[str], dict[str, int]]:
+    """Return thread IDs newest-first (optionally one user's) and their positions."""
+    threads = data["threads"]  # Loading the section first drops stale views
+    view = _thread_views.get(user_id)
+    if view is None:
+        if user_id is None:
+            ids = [
+                t["id"]
+                for t in sorted(threads.values(), key=lambda t: t.get("createdAt", ""), reverse=True)
+            ]
+        else:
+            # Filter the all-users order, which is already sorted
+            ids = [i for i in _thread_view(data, None)[0] if threads[i].get("userId") == user_id]
+        view = (ids, {thread_id: pos for pos, thread_id in enumerate(ids)})
+        _thread_views[user_id] = view
+    return view
+
+
+def _migrate_combined_file(data: _LazyData):
+    """Split a threads.json written before sections had their own files."""
+    if any(SECTION_FILES[name].exists() for name in _SECTIONS if name != "threads"):
+        return
+    try:
+        combined = orjson.loads(THREADS_FILE.read_bytes())
+    except (orjson.JSONDecodeError, OSError):
+        return
+    if not isinstance(combined, dict) or not set(_SECTIONS) <= combined.keys():
+        return
+    for section in _SECTIONS:
+        _install_section(data, section, combined[section])
+    _save_data(data, *_SECTIONS)
+
+
+def _load_data() -> _LazyData:
+    """Return the data sections, dropping any changed on disk so they reload on access."""
+    global _cache
+    if _cache is None:
+        _cache = _LazyData()
+        _migrate_combined_file(_cache)
+        return _cache
+    for section in list(_cache):
+        # Unflushed changes are newer than anything on disk
+        if section not in _dirty_sections and _section_signature(section) != _signatures[section]:
+            del _cache[section]
+    return _cache
+
+
+def _flush_data():
+    """Write pending sections to their files and clear their change logs."""
+    if not _dirty_sections:
+        return
+    _ensure_data_dir()
+    for section in sorted(_dirty_sections):
+        # Write a temp file and rename it over the section file so a crash
+        # mid-write never leaves it truncated
+        path = SECTION_FILES[section]
+        tmp_file = path.with_suffix(".json.tmp")
+        tmp_file.write_bytes(_dumps(_cache[section]))
+        os.replace(tmp_file, path)
+        # The file now holds every logged change; replaying a stale log would
+        # also be harmless, since records are idempotent.
+        if section in _LOGS:
+            _LOGS[section].unlink(missing_ok=True)
+            _log_records[section] = 0
+        _signatures[section] = _section_signature(section)
+    _dirty_sections.clear()
+
+
+async def _flush_later():
+    """Flush once the current burst of writes has had time to accumulate."""
+    global _flush_task
+    await asyncio.sleep(SAVE_DELAY)
+    _flush_task = None
+    _flush_data()
+
+
+def _save_data(data: _LazyData, *sections: str):
+    """Save the given sections, coalescing writes made within SAVE_DELAY."""
+    global _cache, _flush_task
+    _cache = data
+    _dirty_sections.update(sections)
+    if _flush_task is not None:
+        return
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        _flush_data()  # No event loop to defer to
+        return
+    _flush_task = loop.create_task(_flush_later())
+
+
+def _append_change(section: str, record_id: str, value: dict | None):
+    """
+    Persist one step or element change by appending it to its log.
+
+    Args:
+        section: Data section the record belongs to ('steps' or 'elements')
+        record_id: ID of the changed record
+        value: The record's full new value, or None if it was deleted
+    """
     _ensure_data_dir()
-    with open(THREADS_FILE, "w") as f:
-        json.dump(data, f, indent=2, default=str)
+    with open(_LOGS[section], "ab") as f:
+        f.write(_dumps({"id": record_id, "data": value}) + b"\n")
+    _log_records[section] += 1
+    if section in _dirty_sections:
+        return  # The pending flush writes this change too
+    if _log_records[section] >= LOG_COMPACT_RECORDS:
+        assert _cache is not None  # Callers load the data before changing it
+        _save_data(_cache, section)
+    else:
+        _signatures[section] = _section_signature(section)
+
+
+# Don't lose the last burst of writes if the process exits before it flushes
+atexit.register(_flush_data)
 
 
 class FileDataLayer(BaseDataLayer):
@@ -75,7 +324,7 @@ class FileDataLayer(BaseDataLayer):
             "createdAt": now,
         }
         data["users"][user.identifier] = user_data
-        _save_data(data)
+        _save_data(data, "users")
         return PersistedUser(
             id=user.identifier,
             identifier=user.identifier,
@@ -88,12 +337,8 @@ class FileDataLayer(BaseDataLayer):
         data = _load_data()
         thread = data["threads"].get(thread_id)
         if thread:
-            # Attach steps to the thread
-            thread["steps"] = [
-                s for s in data["steps"].values()
-                if s.get("threadId") == thread_id
-            ]
-            return thread
+            # Attach steps to a copy so they never leak into the cached data
+            return {**thread, "steps": _thread_items(data, "steps", thread_id)}
         return None
 
     async def get_thread_author(self, thread_id: str) -> str:
@@ -111,35 +356,26 @@ class FileDataLayer(BaseDataLayer):
     ) -> PaginatedResponse[ThreadDict]:
         """List threads with pagination."""
         data = _load_data()
-        threads = list(data["threads"].values())
-
-        # Filter by user if specified
-        if filters.userId:
-            threads = [t for t in threads if t.get("userId") == filters.userId]
+        # Thread IDs sorted by createdAt descending (newest first), filtered
+        # by user if specified
+        thread_ids, positions = _thread_view(data, filters.userId or None)
 
-        # Sort by createdAt descending (newest first)
-        threads.sort(key=lambda t: t.get("createdAt", ""), reverse=True)
-
-        # Apply pagination
+        # Apply pagination, starting after the cursor (or at the top if unknown)
         start = 0
         if pagination.cursor:
-            # Find the position after the cursor
-            for i, t in enumerate(threads):
-                if t["id"] == pagination.cursor:
-                    start = i + 1
-                    break
+            start = positions.get(pagination.cursor, -1) + 1
 
         end = start + pagination.first
-        page_threads = threads[start:end]
 
-        # Attach steps to each thread
-        for thread in page_threads:
-            thread["steps"] = [
-                s for s in data["steps"].values()
-                if s.get("threadId") == thread["id"]
-            ]
+        # The sidebar only shows thread names; steps are loaded by get_thread
+        # when a thread is opened, so listed copies carry an empty list
+        threads = data["threads"]
+        page_threads = [
+            {**threads[thread_id], "steps": []}
+            for thread_id in thread_ids[start:end]
+        ]
 
-        has_next = end < len(threads)
+        has_next = end < len(thread_ids)
         end_cursor = page_threads[-1]["id"] if page_threads else None
 
         start_cursor = page_threads[0]["id"] if page_threads else None
@@ -173,69 +409,73 @@ class FileDataLayer(BaseDataLayer):
                 "metadata": metadata or {},
                 "tags": tags or [],
             }
+            _thread_views.clear()
         else:
             # Update existing thread
             thread = data["threads"][thread_id]
             if name is not None:
                 thread["name"] = name
-            if user_id is not None:
+            if user_id is not None and thread.get("userId") != user_id:
                 thread["userId"] = user_id
+                _thread_views.clear()
             if metadata is not None:
                 thread["metadata"] = metadata
             if tags is not None:
                 thread["tags"] = tags
-        _save_data(data)
+        _save_data(data, "threads")
 
     async def delete_thread(self, thread_id: str):
         """Delete a thread and its associated data."""
         data = _load_data()
         if thread_id in data["threads"]:
             del data["threads"][thread_id]
-        # Also delete associated steps
-        data["steps"] = {
-            k: v for k, v in data["steps"].items()
-            if v.get("threadId") != thread_id
-        }
-        # Also delete associated elements
-        data["elements"] = {
-            k: v for k, v in data["elements"].items()
-            if v.get("threadId") != thread_id
-        }
-        _save_data(data)
+            _thread_views.clear()
+        # Also delete associated steps and elements
+        for section in ("steps", "elements"):
+            items = data[section]
+            for item_id in _by_thread[section].pop(thread_id, ()):
+                items.pop(item_id, None)
+        _save_data(data, "threads", "steps", "elements")
 
     async def create_step(self, step_dict: StepDict):
         """Create a step."""
         data = _load_data()
         step_id = step_dict.get("id")
         if step_id:
-            data["steps"][step_id] = step_dict
-            _save_data(data)
+            _store_item(data, "steps", step_id, step_dict)
+            _append_change("steps", step_id, step_dict)
 
     async def update_step(self, step_dict: StepDict):
         """Update a step."""
         data = _load_data()
         step_id = step_dict.get("id")
         if step_id:
-            if step_id in data["steps"]:
-                data["steps"][step_id].update(step_dict)
+            step = data["steps"].get(step_id)
+            if step is not None:
+                old_thread_id = step.get("threadId")
+                step.update(step_dict)
+                if step.get("threadId") != old_thread_id:
+                    _index_remove("steps", step_id, old_thread_id)
+                    _index_add("steps", step_id, step.get("threadId"))
             else:
-                data["steps"][step_id] = step_dict
-            _save_data(data)
+                _store_item(data, "steps", step_id, step_dict)
+            _append_change("steps", step_id, data["steps"][step_id])
 
     async def delete_step(self, step_id: str):
         """Delete a step."""
         data = _load_data()
-        if step_id in data["steps"]:
-            del data["steps"][step_id]
-            _save_data(data)
+        step = data["steps"].pop(step_id, None)
+        if step is not None:
+            _index_remove("steps", step_id, step.get("threadId"))
+            _append_change("steps", step_id, None)
 
     async def create_element(self, element_dict: ElementDict):
         """Create an element."""
         data = _load_data()
         element_id = element_dict.get("id")
         if element_id:
-            data["elements"][element_id] = element_dict
-            _save_data(data)
+            _store_item(data, "elements", element_id, element_dict)
+            _append_change("elements", element_id, element_dict)
 
     async def get_element(
         self,
@@ -252,9 +492,10 @@ class FileDataLayer(BaseDataLayer):
     async def delete_element(self, element_id: str, thread_id: Optional[str] = None):
         """Delete an element."""
         data = _load_data()
-        if element_id in data["elements"]:
-            del data["elements"][element_id]
-            _save_data(data)
+        element = data["elements"].pop(element_id, None)
+        if element is not None:
+            _index_remove("elements", element_id, element.get("threadId"))
+            _append_change("elements", element_id, None)
 
     async def upsert_feedback(self, feedback: Feedback) -> str:
         """Upsert feedback (not implemented for file-based storage)."""
@@ -269,5 +510,9 @@ class FileDataLayer(BaseDataLayer):
         return ""
 
     async def close(self):
-        """Clean up resources (nothing to close for file-based storage)."""
-        pass
+        """Write any pending changes to disk."""
+        global _flush_task
+        if _flush_task is not None:
+            _flush_task.cancel()
+            _flush_task = None
+        _flush_data()
@@ -106,6 +106,13 @@ class TestCheckpointerWithGraph:
 
         assert app is not None
 
+    def test_graph_without_checkpointer_compiled_once(self):
+        from langgraph.checkpoint.memory import MemorySaver
+        from src.agent.graph import compile_graph
+
+        assert compile_graph() is compile_graph()
+        assert compile_graph(checkpointer=MemorySaver()) is not compile_graph()
+
     @pytest.mark.asyncio
     async def test_streaming_includes_thread_id(self):
         from src.agent.graph import run_agent_streaming
@@ -0,0 +1,33 @@
+# ABOUTME: Tests for environment-driven application configuration.
+# ABOUTME: Validates flag parsing and that settings are read-only.
+
+import pytest
+
+from src.config import Config
+
+
+class TestConfig:
+    """Tests for the Config settings model."""
+
+    @pytest.mark.parametrize("raw, expected", [
+        ("true", True),
+        (" TRUE ", True),
+        ("false", False),
+        ("", False),
+        ("enabled", False),
+    ])
+    def test_flags_are_true_only_for_true(self, monkeypatch, raw, expected):
+        """Any flag value other than "true" should read as False, never fail."""
+        monkeypatch.setenv("CACHE_ENABLED", raw)
+
+        assert Config().CACHE_ENABLED is expected
+
+    def test_settings_are_read_only(self):
+        with pytest.raises(Exception):
+            Config().CACHE_TTL = 1
+
+    def test_require_api_key(self, monkeypatch):
+        monkeypatch.setenv("OPENAI_API_KEY", "")
+
+        with pytest.raises(ValueError, match="OPENAI_API_KEY"):
+            Config().require_api_key()
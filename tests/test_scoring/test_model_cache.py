@@ -90,8 +90,7 @@ class TestModelCache:
     def test_clear_unloads_model(self):
         """clear() should unload the model."""
         cache = ModelCache.get_instance_sync()
-        cache._model = MagicMock()
-        cache._model_name = "test"
+        cache._loaded = ("test", MagicMock())
 
         cache.clear()
 
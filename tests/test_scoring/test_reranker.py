@@ -10,6 +10,7 @@ from src.scoring.reranker import (
     combine_scores,
     compute_semantic_scores,
     semantic_rerank,
+    semantic_rerank_by_system,
 )
 
 
@@ -208,3 +209,50 @@ class TestSemanticRerank:
 
             # Should return original list on error
             assert result == sample_results
+
+
+class TestSemanticRerankBySystem:
+    """Tests for per-system reranking."""
+
+    @pytest.fixture
+    def mixed_results(self):
+        return [
+            CodeResult(system="ICD-10-CM", code="E11.9", display="Type 2 diabetes mellitus",
+                       confidence=0.5, metadata={}, source={}),
+            CodeResult(system="RxTerms", code="6809", display="Metformin 500 mg",
+                       confidence=0.5, metadata={}, source={}),
+            CodeResult(system="ICD-10-CM", code="E10.9", display="Type 1 diabetes mellitus",
+                       confidence=0.5, metadata={}, source={}),
+        ]
+
+    async def test_single_predict_call(self, mixed_results):
+        """Every system should be scored in one predict call, grouped by system."""
+        with patch("src.scoring.reranker.config") as mock_config, \
+             patch("src.scoring.model_cache.ModelCache") as MockCache:
+
+            mock_config.SEMANTIC_RERANK_ENABLED = True
+
+            mock_instance = MagicMock()
+            mock_model = MagicMock()
+            mock_model.predict.return_value = [0.5, 3.0, 1.0]
+            mock_instance.get_model = AsyncMock(return_value=mock_model)
+            MockCache.get_instance = AsyncMock(return_value=mock_instance)
+
+            result = await semantic_rerank_by_system("diabetes", mixed_results)
+
+            mock_model.predict.assert_called_once()
+            pairs = mock_model.predict.call_args.args[0]
+            assert pairs == [
+                ("diabetes", "E11.9: Type 2 diabetes mellitus"),
+                ("diabetes", "E10.9: Type 1 diabetes mellitus"),
+                ("diabetes", "6809: Metformin 500 mg"),
+            ]
+            assert [r.code for r in result] == ["E10.9", "6809", "E11.9"]
+
+    async def test_disabled_returns_input(self, mixed_results):
+        with patch("src.scoring.reranker.config") as mock_config:
+            mock_config.SEMANTIC_RERANK_ENABLED = False
+
+            result = await semantic_rerank_by_system("diabetes", mixed_results)
+
+            assert result is mixed_results
@@ -5,7 +5,7 @@ import asyncio
 
 import pytest
 
-from src.services.cache import InMemoryCache, APIResponseCache
+from src.services.cache import InMemoryCache, RedisCacheBackend, APIResponseCache
 
 
 class TestInMemoryCache:
@@ -151,3 +151,96 @@ class TestAPIResponseCache:
 
         result = await cache.get("icd10cm", params)
         assert result is None
+
+
+class FakeRedis:
+    """Minimal async stand-in for redis.asyncio.Redis."""
+
+    def __init__(self):
+        self.store: dict[str, bytes] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def scan_iter(self, match=None):
+        prefix = match.rstrip("*") if match else ""
+        for key in list(self.store):
+            if key.startswith(prefix):
+                yield key
+
+
+class TestRedisCacheBackend:
+    """Tests for the Redis cache backend."""
+
+    @pytest.fixture
+    def backend(self):
+        pytest.importorskip("msgpack")
+        pytest.importorskip("redis")
+        backend = RedisCacheBackend("redis://localhost:6379/0")
+        backend._redis = FakeRedis()
+        return backend
+
+    @pytest.mark.asyncio
+    async def test_roundtrip_api_response(self, backend):
+        """Values should survive msgpack serialization."""
+        response = [5, ["E11.9"], {}, [["E11.9", "Diabetes"]]]
+        await backend.set("api:icd10cm:abc", response, ttl=60)
+        assert await backend.get("api:icd10cm:abc") == response
+
+    @pytest.mark.asyncio
+    async def test_keys_are_prefixed(self, backend):
+        """Keys should be namespaced to avoid collisions in a shared database."""
+        await backend.set("key1", "v1", ttl=60)
+        assert list(backend._redis.store) == ["ccf:key1"]
+
+    @pytest.mark.asyncio
+    async def test_non_positive_ttl_not_stored(self, backend):
+        """Zero TTL should behave as immediately expired."""
+        await backend.set("key1", "v1", ttl=0)
+        assert await backend.get("key1") is None
+
+    @pytest.mark.asyncio
+    async def test_clear_only_removes_own_keys(self, backend):
+        """Clear should leave foreign keys in the database untouched."""
+        backend._redis.store["other:key"] = b"x"
+        await backend.set("key1", "v1", ttl=60)
+        await backend.clear()
+        assert list(backend._redis.store) == ["other:key"]
+
+    @pytest.mark.asyncio
+    async def test_redis_errors_degrade_to_cache_miss(self, backend):
+        """A Redis outage should read as a miss and skip writes, not raise."""
+        from redis.exceptions import ConnectionError as RedisConnectionError
+
+        async def down(*args, **kwargs):
+            raise RedisConnectionError("connection refused")
+
+        async def down_scan(*args, **kwargs):
+            raise RedisConnectionError("connection refused")
+            yield
+
+        backend._redis.get = down
+        backend._redis.set = down
+        backend._redis.delete = down
+        backend._redis.scan_iter = down_scan
+
+        await backend.set("key1", "v1", ttl=60)
+        await backend.set("key1", "v1", ttl=0)
+        await backend.clear()
+        assert await backend.get("key1") is None
+
+    @pytest.mark.asyncio
+    async def test_corrupt_entry_is_a_cache_miss(self, backend):
+        """Undecodable bytes under our key should read as a miss, not raise."""
+        backend._redis.store["ccf:key1"] = b"\xc1"
+        backend._redis.store["ccf:key2"] = b"\x92\x01"
+
+        assert await backend.get("key1") is None
+        assert await backend.get("key2") is None
@@ -1,9 +1,13 @@
 # ABOUTME: Tests for HTTP client manager with connection pooling.
 # ABOUTME: Validates singleton behavior, connection reuse, and cleanup.
 
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import httpx
 import pytest
 
-from src.services.http import HTTPClientManager
+from src.services.http import HTTPClientClosingError, HTTPClientManager
 
 
 class TestHTTPClientManager:
@@ -32,6 +36,16 @@ class TestHTTPClientManager:
         assert client is not None
         assert not client.is_closed
 
+    @pytest.mark.asyncio
+    async def test_client_uses_http2_keepalive_transport(self):
+        """Pool should always negotiate HTTP/2 and keep idle connections warm."""
+        manager = await HTTPClientManager.get_instance()
+        client = await manager.get_client()
+
+        pool = client._transport._pool
+        assert pool._http2 is True
+        assert pool._keepalive_expiry == manager._keepalive_expiry
+
     @pytest.mark.asyncio
     async def test_client_reuse(self):
         """Should return same client on multiple calls."""
@@ -51,6 +65,40 @@ class TestHTTPClientManager:
 
         assert client.is_closed
 
+    @pytest.mark.asyncio
+    async def test_close_is_idempotent(self):
+        """Closing twice (or before any client exists) should be a no-op."""
+        manager = await HTTPClientManager.get_instance()
+        await manager.close()
+        await manager.get_client()
+        await manager.close()
+        await manager.close()
+
+        assert manager._client is None
+
+    @pytest.mark.asyncio
+    async def test_get_client_refused_while_closing(self):
+        """Checkouts during close() should fail instead of opening a new pool."""
+        manager = await HTTPClientManager.get_instance()
+        client = await manager.get_client()
+        release = asyncio.Event()
+        original_aclose = client.aclose
+
+        async def slow_aclose():
+            await release.wait()
+            await original_aclose()
+
+        client.aclose = slow_aclose
+        closing = asyncio.create_task(manager.close())
+        await asyncio.sleep(0)
+
+        with pytest.raises(HTTPClientClosingError, match="shutting down"):
+            await manager.get_client()
+
+        release.set()
+        await closing
+        assert not manager._closing
+
     @pytest.mark.asyncio
     async def test_get_client_after_close_creates_new(self):
         """Should create new client after close."""
@@ -76,3 +124,53 @@ class TestHTTPClientManager:
         manager = HTTPClientManager.get_instance_sync()
         assert manager is not None
         assert HTTPClientManager._instance is manager
+
+    def test_get_instance_across_event_loops(self):
+        """Singleton lookup should work from separate event loops."""
+        instance1 = asyncio.run(HTTPClientManager.get_instance())
+        instance2 = asyncio.run(HTTPClientManager.get_instance())
+
+        assert instance1 is instance2
+
+
+class TestHTTPClientWarmup:
+    """Tests for pre-connecting the pool."""
+
+    @pytest.mark.asyncio
+    async def test_warmup_sends_head_on_pooled_client(self):
+        """Warmup should issue a HEAD over the pooled client."""
+        manager = HTTPClientManager()
+        pooled = AsyncMock()
+        with patch.object(manager, "get_client", AsyncMock(return_value=pooled)):
+            await manager.warmup("https://example.com/ping")
+
+        pooled.head.assert_awaited_once_with("https://example.com/ping")
+
+    @pytest.mark.asyncio
+    async def test_warmup_swallows_network_errors(self):
+        """Warmup is best-effort and must not raise when offline."""
+        manager = HTTPClientManager()
+        pooled = AsyncMock()
+        pooled.head.side_effect = httpx.ConnectError("offline")
+        with patch.object(manager, "get_client", AsyncMock(return_value=pooled)):
+            await manager.warmup()
+
+    @pytest.mark.asyncio
+    async def test_warmup_swallows_shutdown_errors(self):
+        """A checkout refused during close() must not escape the warmup task."""
+        manager = HTTPClientManager()
+        closing = AsyncMock(side_effect=HTTPClientClosingError("shutting down"))
+        with patch.object(manager, "get_client", closing):
+            await manager.warmup()
+
+    @pytest.mark.asyncio
+    async def test_warmup_skipped_when_pool_exists(self):
+        """Once the pool is open, later chat starts should not send a HEAD."""
+        manager = HTTPClientManager()
+        client = await manager.get_client()
+        try:
+            with patch.object(client, "head", AsyncMock()) as head:
+                await manager.warmup()
+            head.assert_not_awaited()
+        finally:
+            await manager.close()
@@ -4,7 +4,7 @@
 import pytest
 from unittest.mock import AsyncMock, patch
 
-from src.tools.base import CodeResult
+from src.tools.base import CodeResult, SearchRow
 from src.tools.icd10 import ICD10Tool
 from src.tools.loinc import LOINCTool
 from src.tools.rxterms import RxTermsTool
@@ -30,11 +30,11 @@ class TestICD10Tool:
     async def test_search_returns_code_results(self, tool):
         """Tool should return list of CodeResult objects."""
         mock_response = [
-            {"code": "E11.9", "display": "Type 2 diabetes mellitus without complications"},
-            {"code": "E11.65", "display": "Type 2 DM with hyperglycemia"},
+            SearchRow("E11.9", "Type 2 diabetes mellitus without complications"),
+            SearchRow("E11.65", "Type 2 DM with hyperglycemia"),
         ]
 
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = mock_response
 
             results = await tool.search("diabetes", max_results=5)
@@ -48,15 +48,26 @@ class TestICD10Tool:
     @pytest.mark.asyncio
     async def test_search_uses_correct_fields(self, tool):
         """Tool should use correct search and display fields."""
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = []
 
             await tool.search("test", max_results=5)
 
             mock_search.assert_called_once()
             call_kwargs = mock_search.call_args[1]
-            assert "code" in call_kwargs.get("search_fields", [])
-            assert "name" in call_kwargs.get("search_fields", [])
+            assert "code" in call_kwargs["sf"].split(",")
+            assert "name" in call_kwargs["sf"].split(",")
+
+    @pytest.mark.asyncio
+    async def test_results_do_not_share_source(self, tool):
+        """Enriching one result's source must not leak into its siblings."""
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
+            mock_search.return_value = [SearchRow("E11.9", "Type 2 DM"), SearchRow("E10.9", "Type 1 DM")]
+
+            results = await tool.search("diabetes", max_results=5)
+
+        results[0].source["hop"] = "hierarchy"
+        assert results[1].source == {"tool": "icd10", "term_used": "diabetes"}
 
     @pytest.mark.integration
     @pytest.mark.asyncio
@@ -84,10 +95,10 @@ class TestLOINCTool:
     @pytest.mark.asyncio
     async def test_search_returns_code_results(self, tool):
         mock_response = [
-            {"code": "2345-7", "display": "Glucose [Mass/volume] in Serum or Plasma"},
+            SearchRow("2345-7", "Glucose [Mass/volume] in Serum or Plasma"),
         ]
 
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = mock_response
 
             results = await tool.search("glucose", max_results=5)
@@ -121,14 +132,14 @@ class TestRxTermsTool:
     @pytest.mark.asyncio
     async def test_search_returns_code_results(self, tool):
         mock_response = [
-            {
-                "code": "metformin (Oral Pill)",
-                "display": "metformin (Oral Pill)",
-                "extra": {"RXCUIS": "123456", "STRENGTHS_AND_FORMS": "500 MG Oral Tablet"},
-            },
+            SearchRow(
+                "metformin (Oral Pill)",
+                "metformin (Oral Pill)",
+                {"RXCUIS": "123456", "STRENGTHS_AND_FORMS": "500 MG Oral Tablet"},
+            ),
         ]
 
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = mock_response
 
             results = await tool.search("metformin", max_results=5)
@@ -161,10 +172,10 @@ class TestHCPCSTool:
     @pytest.mark.asyncio
     async def test_search_returns_code_results(self, tool):
         mock_response = [
-            {"code": "K0001", "display": "Standard wheelchair"},
+            SearchRow("K0001", "Standard wheelchair"),
         ]
 
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = mock_response
 
             results = await tool.search("wheelchair", max_results=5)
@@ -198,10 +209,10 @@ class TestUCUMTool:
     @pytest.mark.asyncio
     async def test_search_returns_code_results(self, tool):
         mock_response = [
-            {"code": "mg/dL", "display": "milligram per deciliter"},
+            SearchRow("mg/dL", "milligram per deciliter"),
         ]
 
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = mock_response
 
             results = await tool.search("mg/dL", max_results=5)
@@ -235,10 +246,10 @@ class TestHPOTool:
     @pytest.mark.asyncio
     async def test_search_returns_code_results(self, tool):
         mock_response = [
-            {"code": "HP:0001251", "display": "Ataxia"},
+            SearchRow("HP:0001251", "Ataxia"),
         ]
 
-        with patch.object(tool.client, "search", new_callable=AsyncMock) as mock_search:
+        with patch.object(tool.client, "search_precomposed", new_callable=AsyncMock) as mock_search:
             mock_search.return_value = mock_response
 
             results = await tool.search("ataxia", max_results=5)
@@ -255,3 +266,39 @@ class TestHPOTool:
         assert len(results) > 0
         assert all(r.system == "HPO" for r in results)
         assert any("ataxia" in r.display.lower() for r in results)
+
+
+class TestSearchAll:
+    """Tests for the concurrent all-systems fan-out."""
+
+    @pytest.mark.asyncio
+    async def test_searches_every_system_with_shared_client(self):
+        """Every tool should be queried once through the same client."""
+        from src.tools.base import APIError, ClinicalTablesClient
+        from src.tools.search import search_all
+
+        client = ClinicalTablesClient()
+
+        async def fake_search(table, term, **kwargs):
+            if table == "hcpcs":
+                raise APIError("boom")
+            return [SearchRow(f"{table}-1", term)]
+
+        with patch.object(client, "search_precomposed", side_effect=fake_search) as mock_search:
+            results = await search_all("diabetes", max_results=3, client=client)
+
+        assert mock_search.call_count == 6
+        assert set(results) == {"ICD-10-CM", "LOINC", "RxTerms", "HCPCS", "UCUM", "HPO"}
+        assert isinstance(results["HCPCS"], APIError)
+        assert results["LOINC"][0].code == "loinc_items-1"
+
+
+class TestSharedDefaultClient:
+    """Tools built without a client should share one instance."""
+
+    def test_tools_share_default_client(self):
+        from src.tools.base import get_default_client
+
+        tools = [ICD10Tool(), LOINCTool(), RxTermsTool(), HCPCSTool(), UCUMTool(), HPOTool()]
+
+        assert all(t.client is get_default_client() for t in tools)
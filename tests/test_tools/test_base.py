@@ -1,6 +1,8 @@
 # ABOUTME: Tests for the base Clinical Tables HTTP client.
 # ABOUTME: Validates response parsing, error handling, and timeout behavior.
 
+import asyncio
+
 import pytest
 from unittest.mock import AsyncMock, patch
 import httpx
@@ -43,6 +45,22 @@ class TestCodeResult:
         assert d["confidence"] == 0.85
         assert d["metadata"]["component"] == "Glucose"
 
+    def test_code_result_to_dict_is_independent(self):
+        """Mutating the serialized dict should not leak back into the result."""
+        result = CodeResult(
+            system="HPO",
+            code="HP:0001251",
+            display="Ataxia",
+            confidence=0.5,
+            metadata={"definition": "Lack of coordination"},
+            source={"tool": "hpo", "term_used": "ataxia"},
+        )
+        d = result.to_dict()
+        d["metadata"]["definition"] = "changed"
+
+        assert result.metadata["definition"] == "Lack of coordination"
+        assert not hasattr(result, "__dict__")
+
 
 class TestClinicalTablesClient:
     """Tests for the HTTP client wrapper."""
@@ -63,6 +81,13 @@ class TestClinicalTablesClient:
         assert "terms=diabetes" in url
         assert "maxList=10" in url
 
+    def test_build_url_quotes_only_terms(self, client):
+        """Free-text terms are escaped; field lists and ints pass through."""
+        url = client.build_url(
+            "loinc_items", {"terms": "a1c & glucose", "maxList": 5, "df": "LOINC_NUM,COMPONENT"}
+        )
+        assert url.endswith("?terms=a1c+%26+glucose&maxList=5&df=LOINC_NUM,COMPONENT")
+
     @pytest.mark.asyncio
     async def test_search_parses_response(self, client):
         """Client should parse the 5-element array response format."""
@@ -80,9 +105,9 @@ class TestClinicalTablesClient:
             results = await client.search("icd10cm", "diabetes", max_results=10)
 
             assert len(results) == 2
-            assert results[0]["code"] == "E11.9"
-            assert results[0]["display"] == "Type 2 diabetes mellitus without complications"
-            assert results[1]["code"] == "E11.65"
+            assert results[0].code == "E11.9"
+            assert results[0].display == "Type 2 diabetes mellitus without complications"
+            assert results[1].code == "E11.65"
 
     @pytest.mark.asyncio
     async def test_search_handles_empty_results(self, client):
@@ -117,7 +142,37 @@ class TestClinicalTablesClient:
                 extra_fields=["COMPONENT"],
             )
 
-            assert results[0]["extra"]["COMPONENT"] == "Glucose"
+            assert results[0].extra["COMPONENT"] == "Glucose"
+
+    def test_parse_response_skips_code_and_empty_fields(self, client):
+        """Leading code and empty display parts should be dropped; short rows padded."""
+        response = [
+            3,
+            ["A1", "B2", "C3"],
+            {"COMPONENT": ["Glucose", "Sodium"]},
+            [["A1", "Alpha", None], ["Beta"]],
+            None,
+        ]
+
+        results = client._parse_response(response, ["COMPONENT", "METHOD_TYP"])
+
+        assert [r.display for r in results] == ["Alpha", "Beta", ""]
+        assert results[0].extra == {"COMPONENT": "Glucose"}
+        assert results[2].extra == {}
+
+    def test_parse_response_tolerates_non_list_displays(self, client):
+        """String display entries stay whole and non-string fields are stringified."""
+        response = [
+            3,
+            ["A1", "B2", "C3"],
+            {},
+            ["Alpha", ["B2", 42, None, "Beta"], 7],
+            None,
+        ]
+
+        results = client._parse_response(response)
+
+        assert [r.display for r in results] == ["Alpha", "42 - Beta", "7"]
 
     @pytest.mark.asyncio
     async def test_search_raises_on_timeout(self, client):
@@ -130,6 +185,57 @@ class TestClinicalTablesClient:
 
             assert "timeout" in str(exc_info.value).lower()
 
+    @pytest.mark.asyncio
+    async def test_search_chains_transport_error(self, client):
+        """Transport failures should surface as APIError chained to the cause."""
+        client.max_retries = 0
+        cause = httpx.ConnectError("connection refused")
+        with patch.object(client, "_fetch", new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.side_effect = cause
+
+            with pytest.raises(APIError) as exc_info:
+                await client.search("icd10cm", "diabetes", max_results=10)
+
+            assert exc_info.value.__cause__ is cause
+
+    @pytest.mark.asyncio
+    async def test_retries_reuse_parsed_url(self, client):
+        """Every retry attempt should get the same pre-parsed httpx.URL."""
+        client.max_retries = 1
+        with patch.object(client, "_fetch", new_callable=AsyncMock) as mock_fetch, \
+             patch("src.tools.base.asyncio.sleep", new_callable=AsyncMock):
+            mock_fetch.side_effect = httpx.ConnectError("connection refused")
+
+            with pytest.raises(APIError):
+                await client.search("icd10cm", "diabetes", max_results=10)
+
+        urls = [call.args[0] for call in mock_fetch.await_args_list]
+        assert len(urls) == 2
+        assert isinstance(urls[0], httpx.URL)
+        assert urls[0] is urls[1]
+
+    @pytest.mark.asyncio
+    async def test_search_wraps_pool_closing_error(self, client):
+        """A checkout during pool shutdown should surface as APIError."""
+        from src.services.http import HTTPClientClosingError
+
+        client.max_retries = 0
+        closing = AsyncMock(side_effect=HTTPClientClosingError("HTTP client manager is shutting down"))
+        with patch.object(client, "_get_client", closing), \
+             pytest.raises(APIError, match="shutting down"):
+            await client.search("icd10cm", "diabetes")
+
+    @pytest.mark.asyncio
+    async def test_search_does_not_wrap_programming_errors(self, client):
+        """Unexpected exceptions should propagate instead of being retried."""
+        with patch.object(client, "_fetch", new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.side_effect = TypeError("bug")
+
+            with pytest.raises(TypeError):
+                await client.search("icd10cm", "diabetes", max_results=10)
+
+            assert mock_fetch.await_count == 1
+
     @pytest.mark.asyncio
     async def test_search_raises_on_http_error(self, client):
         """Client should raise APIError on HTTP errors."""
@@ -145,6 +251,29 @@ class TestClinicalTablesClient:
 
             assert "500" in str(exc_info.value) or "error" in str(exc_info.value).lower()
 
+    @pytest.mark.asyncio
+    async def test_fetch_uses_pooled_client_without_manager(self, client):
+        """Without an explicit manager, requests should reuse the shared pool."""
+        from src.services.http import HTTPClientManager
+
+        response = httpx.Response(
+            200,
+            json=[1, ["E11.9"], None, [["E11.9", "Type 2 diabetes"]]],
+            request=httpx.Request("GET", "https://example.com"),
+        )
+        pooled = AsyncMock()
+        pooled.get.return_value = response
+        manager = AsyncMock()
+        manager.get_client.return_value = pooled
+
+        with patch.object(HTTPClientManager, "get_instance", AsyncMock(return_value=manager)):
+            await client._fetch("https://example.com")
+            data = await client._fetch("https://example.com")
+
+        assert data == [1, ["E11.9"], None, [["E11.9", "Type 2 diabetes"]]]
+        assert pooled.get.await_count == 2
+        assert pooled.get.call_args.kwargs["timeout"] == client.timeout
+
 
 class TestClinicalTablesClientIntegration:
     """Integration tests that hit the real API (marked for selective running)."""
@@ -165,8 +294,8 @@ class TestClinicalTablesClientIntegration:
         )
 
         assert len(results) > 0
-        assert any("diabetes" in r["display"].lower() for r in results)
-        assert all(r["code"] for r in results)
+        assert any("diabetes" in r.display.lower() for r in results)
+        assert all(r.code for r in results)
 
     @pytest.mark.integration
     @pytest.mark.asyncio
@@ -180,4 +309,164 @@ class TestClinicalTablesClientIntegration:
         )
 
         assert len(results) > 0
-        assert any("ataxia" in r["display"].lower() for r in results)
+        assert any("ataxia" in r.display.lower() for r in results)
+
+
+class TestClinicalTablesClientCaching:
+    """Tests for the default in-process response cache."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_search_served_from_cache(self):
+        """Identical searches should only hit the network once."""
+        client = ClinicalTablesClient(timeout=5.0)
+        mock_response = [1, ["E11.9"], {}, [["E11.9", "Type 2 diabetes mellitus"]], None]
+
+        with patch.object(client, "_fetch", new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = mock_response
+
+            first = await client.search("icd10cm", "diabetes", max_results=5)
+            second = await client.search("icd10cm", "diabetes", max_results=5)
+            await client.search("icd10cm", "diabetes", max_results=10)
+
+        assert first == second
+        assert mock_fetch.await_count == 2
+
+    def test_no_default_cache_when_disabled(self):
+        """CACHE_ENABLED=false should leave bare clients uncached."""
+        with patch("src.config.config") as mock_config:
+            mock_config.CACHE_ENABLED = False
+            client = ClinicalTablesClient()
+
+        assert client._cache is None
+
+    def test_explicit_none_disables_cache(self):
+        """Passing cache=None should opt out even when caching is enabled."""
+        with patch("src.config.config") as mock_config:
+            mock_config.CACHE_ENABLED = True
+            client = ClinicalTablesClient(cache=None)
+
+        assert client._cache is None
+
+    def test_default_cache_uses_configured_backend(self):
+        """Bare clients should honour CACHE_BACKEND like the agent's shared client."""
+        pytest.importorskip("msgpack")
+        pytest.importorskip("redis")
+        from src.services.cache import RedisCacheBackend
+
+        with patch("src.config.config") as mock_config:
+            mock_config.CACHE_ENABLED = True
+            mock_config.CACHE_BACKEND = "redis"
+            mock_config.REDIS_URL = "redis://localhost:6379/0"
+            mock_config.CACHE_TTL = 60
+            client = ClinicalTablesClient()
+
+        assert isinstance(client._cache._backend, RedisCacheBackend)
+
+
+class TestSingleFlight:
+    """Tests for coalescing identical concurrent searches."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_duplicates_share_one_fetch(self):
+        """Concurrent identical searches should trigger a single network call."""
+        client = ClinicalTablesClient(timeout=5.0)
+        client._cache = None
+        release = asyncio.Event()
+
+        async def slow_fetch(url):
+            await release.wait()
+            return [1, ["E11.9"], {}, [["E11.9", "Type 2 diabetes mellitus"]], None]
+
+        with patch.object(client, "_fetch", side_effect=slow_fetch) as mock_fetch:
+            tasks = [
+                asyncio.create_task(client.search("icd10cm", "diabetes", max_results=5))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            results = await asyncio.gather(*tasks)
+
+        assert mock_fetch.call_count == 1
+        assert all(r == results[0] for r in results)
+        assert results[0] is not results[1]
+        assert client._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_waiters_receive_leader_error(self):
+        """A failed in-flight request should fail every waiter, then clear."""
+        client = ClinicalTablesClient(timeout=5.0, max_retries=0)
+        client._cache = None
+        release = asyncio.Event()
+
+        async def failing_fetch(url):
+            await release.wait()
+            raise httpx.ConnectError("down")
+
+        with patch.object(client, "_fetch", side_effect=failing_fetch):
+            tasks = [
+                asyncio.create_task(client.search("icd10cm", "diabetes"))
+                for _ in range(2)
+            ]
+            await asyncio.sleep(0)
+            release.set()
+            outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(o, APIError) for o in outcomes)
+        assert client._inflight == {}
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self):
+        """Cancelling the caller that started a fetch should not abort followers."""
+        client = ClinicalTablesClient(timeout=5.0)
+        client._cache = None
+        release = asyncio.Event()
+
+        async def slow_fetch(url):
+            await release.wait()
+            return [1, ["E11.9"], {}, [["E11.9", "Type 2 diabetes mellitus"]], None]
+
+        with patch.object(client, "_fetch", side_effect=slow_fetch) as mock_fetch:
+            leader = asyncio.create_task(client.search("icd10cm", "diabetes"))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(client.search("icd10cm", "diabetes"))
+            await asyncio.sleep(0)
+            leader.cancel()
+            await asyncio.sleep(0)
+            release.set()
+            result = await follower
+
+        assert leader.cancelled()
+        assert result[0].code == "E11.9"
+        assert mock_fetch.call_count == 1
+        assert client._inflight == {}
+
+
+class TestPrecomposedSearch:
+    """Tests for the fixed-field URL fast path."""
+
+    @pytest.mark.asyncio
+    async def test_url_prefix_memoized_and_term_quoted(self):
+        """Field params are encoded once per table; only terms/maxList vary."""
+        client = ClinicalTablesClient(timeout=5.0)
+        client._cache = None
+        mock_response = [0, [], {}, [], None]
+
+        with patch.object(client, "_fetch", new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = mock_response
+
+            await client.search(
+                "icd10cm", "type 2 diabetes", max_results=600,
+                search_fields=("code", "name"), display_fields=("code", "name"),
+            )
+            await client.search_precomposed(
+                "icd10cm", "a&b", max_results=5, sf="code,name", df="code,name",
+            )
+
+        first_url = str(mock_fetch.await_args_list[0].args[0])
+        second_url = str(mock_fetch.await_args_list[1].args[0])
+        assert first_url == (
+            "https://clinicaltables.nlm.nih.gov/api/icd10cm/v3/search"
+            "?sf=code,name&df=code,name&terms=type+2+diabetes&maxList=500"
+        )
+        assert second_url.endswith("&terms=a%26b&maxList=5")
+        assert len(client._url_prefixes) == 1
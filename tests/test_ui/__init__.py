@@ -0,0 +1,2 @@
+# ABOUTME: Unit tests for the Chainlit UI layer.
+# ABOUTME: Runs against a stubbed chainlit so no UI runtime is needed.
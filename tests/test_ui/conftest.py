@@ -0,0 +1,120 @@
+# ABOUTME: Shared setup for UI module tests.
+# ABOUTME: Installs a minimal chainlit stand-in when the real package is not installed.
+
+import sys
+import types
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+
+def _identity(fn):
+    return fn
+
+
+class _Action:
+    """Records the keyword arguments an action button was built with."""
+
+    def __init__(self, **kwargs: Any):
+        self.__dict__.update(kwargs)
+
+
+class _UserSession(dict):
+    """Dict-backed stand-in for cl.user_session."""
+
+    def set(self, key: str, value: Any) -> None:
+        self[key] = value
+
+
+@dataclass
+class _User:
+    identifier: str
+    metadata: dict | None = None
+
+
+@dataclass
+class _PersistedUser:
+    id: str
+    identifier: str
+    createdAt: str
+    metadata: dict | None = None
+
+
+@dataclass
+class _Pagination:
+    first: int
+    cursor: str | None = None
+
+
+@dataclass
+class _ThreadFilter:
+    userId: str | None = None
+
+
+@dataclass
+class _PageInfo:
+    hasNextPage: bool
+    startCursor: str | None
+    endCursor: str | None
+
+
+_T = TypeVar("_T")
+
+
+@dataclass
+class _PaginatedResponse(Generic[_T]):
+    data: list[_T]
+    pageInfo: _PageInfo
+
+
+@dataclass
+class _Feedback:
+    forId: str
+    value: int
+    id: str | None = None
+
+
+def _install_chainlit_stub() -> None:
+    """Register just enough of chainlit for src.ui modules to import."""
+    cl = types.ModuleType("chainlit")
+    cl.Action = _Action
+    # Only referenced in handler annotations and bodies, which tests never run
+    for name in ("Message", "Step", "File", "User", "ChatSettings"):
+        setattr(cl, name, type(name, (), {}))
+    cl.user_session = _UserSession()
+    cl.action_callback = lambda name: _identity
+    for decorator in (
+        "data_layer",
+        "password_auth_callback",
+        "on_chat_start",
+        "on_settings_update",
+        "on_message",
+    ):
+        setattr(cl, decorator, _identity)
+
+    submodules = {
+        "data": {"BaseDataLayer": object},
+        "types": {
+            "Feedback": _Feedback,
+            "PageInfo": _PageInfo,
+            "PaginatedResponse": _PaginatedResponse,
+            "Pagination": _Pagination,
+            "ThreadDict": dict,
+            "ThreadFilter": _ThreadFilter,
+        },
+        "user": {"User": _User, "PersistedUser": _PersistedUser},
+        "step": {"StepDict": dict},
+        "element": {"ElementDict": dict},
+        "input_widget": {"Switch": _Action},
+    }
+    sys.modules["chainlit"] = cl
+    for name, attrs in submodules.items():
+        module = types.ModuleType(f"chainlit.{name}")
+        module.__dict__.update(attrs)
+        setattr(cl, name, module)
+        sys.modules[f"chainlit.{name}"] = module
+
+
+try:
+    import chainlit  # noqa: F401
+except ImportError:
+    _install_chainlit_stub()
@@ -0,0 +1,259 @@
+# ABOUTME: Tests for the pure helpers in the Chainlit app module.
+# ABOUTME: Covers state merging, result normalization, action budgets, CSV export, and follow-up plans.
+
+import csv
+import io
+from unittest.mock import patch
+
+import pytest
+
+from src.config import config
+from src.tools.base import CodeResult
+
+# The app validates OPENAI_API_KEY at import; the helpers under test never call the API
+with patch.object(type(config), "require_api_key"):
+    from src.ui import chainlit_app as app
+
+
+def _result(system, code, display="", confidence=0.9):
+    return {
+        "system": system,
+        "code": code,
+        "display": display,
+        "confidence": confidence,
+        "metadata": {},
+    }
+
+
+ALL_SYSTEMS = [
+    _result("ICD-10-CM", "E11.9", "Type 2 diabetes mellitus without complications"),
+    _result("RxTerms", "metformin (Oral Pill)", "metformin (Oral Pill)"),
+    _result("LOINC", "2345-7", "Glucose [Mass/volume] in Serum or Plasma"),
+    _result("HCPCS", "A4253", "Blood glucose test strips"),
+    _result("UCUM", "mg/dL", "milligram per deciliter"),
+    _result("HPO", "HP:0003074", "Hyperglycemia"),
+]
+
+
+class TestMergeStateDeltas:
+    """Tests for folding per-node state updates into a final state."""
+
+    def test_lists_accumulate_and_scalars_take_latest(self):
+        deltas = [
+            {"search_terms": ["diabetes"], "summary": "first"},
+            {"search_terms": ["glucose"], "summary": "second", "iteration": 2},
+        ]
+
+        merged = app.merge_state_deltas(deltas)
+
+        assert merged == {
+            "search_terms": ["diabetes", "glucose"],
+            "summary": "second",
+            "iteration": 2,
+        }
+
+    def test_event_payloads_are_not_mutated(self):
+        first = {"reasoning_trace": ["a"]}
+
+        app.merge_state_deltas([first, {"reasoning_trace": ["b"]}])
+
+        assert first == {"reasoning_trace": ["a"]}
+
+    def test_non_list_fields_are_replaced_not_extended(self):
+        merged = app.merge_state_deltas([{"raw_results": {"a": 1}}, {"raw_results": {"b": 2}}])
+
+        assert merged["raw_results"] == {"b": 2}
+
+
+class TestSlimState:
+    """Tests for trimming cached agent states."""
+
+    def test_keeps_only_rendered_fields(self):
+        state = {
+            "summary": "Found codes",
+            "consolidated_results": [],
+            "api_calls": [{"url": "x"}],
+            "raw_results": {"ICD-10-CM": []},
+        }
+
+        assert app.slim_state(state) == {"summary": "Found codes", "consolidated_results": []}
+
+    def test_every_cached_field_survives(self):
+        state = {key: key for key in app.CACHED_STATE_FIELDS}
+
+        assert app.slim_state(state) == state
+
+
+class TestNormalizeResults:
+    """Tests for converting agent results to plain dicts."""
+
+    def test_code_results_become_dicts(self):
+        result = CodeResult("LOINC", "2345-7", "Glucose", 0.8, {"COMPONENT": "Glucose"}, {})
+
+        assert app.normalize_results([result]) == [{
+            "system": "LOINC",
+            "code": "2345-7",
+            "display": "Glucose",
+            "confidence": 0.8,
+            "metadata": {"COMPONENT": "Glucose"},
+        }]
+
+    def test_missing_and_empty_dict_fields_get_defaults(self):
+        normalized = app.normalize_results([{"code": "E11.9", "display": None}])
+
+        assert normalized == [{
+            "system": "",
+            "code": "E11.9",
+            "display": "",
+            "confidence": 0.0,
+            "metadata": {},
+        }]
+
+
+class TestGetResultActions:
+    """Tests for the result-message button budget."""
+
+    def test_no_results_no_actions(self):
+        assert app.get_result_actions([], "diabetes", bundle_size=2) == []
+
+    def test_budget_caps_buttons_in_priority_order(self):
+        actions = app.get_result_actions(ALL_SYSTEMS, "diabetes", bundle_size=2)
+
+        assert len(actions) == app.MAX_ACTIONS
+        names = [a.name for a in actions]
+        assert names[:app.MAX_SUGGESTIONS] == ["followup"] * app.MAX_SUGGESTIONS
+        assert names[app.MAX_SUGGESTIONS:] == ["add_to_bundle"] * 3 + ["export_csv"]
+
+    def test_view_bundle_added_when_room(self):
+        actions = app.get_result_actions([_result("UCUM", "mg/dL")], "mg", bundle_size=2)
+
+        assert [a.name for a in actions] == ["add_to_bundle", "export_csv", "view_bundle"]
+        assert actions[-1].label == "View bundle (2)"
+
+    def test_empty_bundle_has_no_view_button(self):
+        actions = app.get_result_actions([_result("UCUM", "mg/dL")], "mg", bundle_size=0)
+
+        assert "view_bundle" not in [a.name for a in actions]
+
+    def test_follow_ups_capped_even_with_every_system(self):
+        suggestions = app.get_follow_up_suggestions(ALL_SYSTEMS, "diabetes")
+
+        assert len(suggestions) == app.MAX_SUGGESTIONS
+        assert [s.payload["type"] for s in suggestions] == [
+            "meds_for_diagnosis",
+            "check_billable",
+            "other_strengths",
+            "diagnosis_for_drug",
+        ]
+
+
+class TestGenerateCsv:
+    """Tests for CSV export."""
+
+    def _rows(self, content: bytes) -> list[list[str]]:
+        return list(csv.reader(io.StringIO(content.decode("utf-8"))))
+
+    def test_returns_utf8_bytes_with_header(self):
+        content = app.generate_csv([_result("HPO", "HP:0001251", "Ataxia – cerebellar", 0.756)], "ataxia")
+
+        assert isinstance(content, bytes)
+        assert self._rows(content) == [
+            ["Code", "Display", "System", "Confidence", "Query"],
+            ["HP:0001251", "Ataxia – cerebellar", "HPO", "0.76", "ataxia"],
+        ]
+
+    @pytest.mark.parametrize("prefix", ["=", "+", "@", "-"])
+    def test_formula_prefixes_are_neutralized(self, prefix):
+        row = _result("ICD-10-CM", f"{prefix}E11", f"{prefix}HYPERLINK(\"x\")")
+
+        content = app.generate_csv([row], f"{prefix}cmd")
+
+        code, display, _, _, query = self._rows(content)[1]
+        assert code == f"'{prefix}E11"
+        assert display == f"'{prefix}HYPERLINK(\"x\")"
+        assert query == f"'{prefix}cmd"
+
+    def test_empty_values_stay_empty(self):
+        content = app.generate_csv([_result("", "", "")], "")
+
+        assert self._rows(content)[1] == ["", "", "", "0.90", ""]
+
+
+class TestTextHelpers:
+    """Tests for small text helpers."""
+
+    def test_truncate_keeps_short_text(self):
+        assert app._truncate("Ataxia", 6) == "Ataxia"
+
+    def test_truncate_marks_cut(self):
+        assert app._truncate("Hyperglycemia", 5) == "Hyper..."
+
+    @pytest.mark.parametrize("display, expected", [
+        ("Family history of leukemia", "leukemia"),
+        ("Type 2 diabetes mellitus", "diabetes mellitus"),
+        ("Other unspecified type 1 with ketoacidosis", "ketoacidosis"),
+        ("Otherwise healthy", "Otherwise healthy"),
+        ("Unspecified", ""),
+    ])
+    def test_icd_prefix_regex_strips_stacked_qualifiers(self, display, expected):
+        assert app._ICD_PREFIX_RE.sub("", display) == expected
+
+
+class TestFollowupPlans:
+    """Tests for the follow-up plan builders."""
+
+    def test_every_suggestion_type_except_billable_has_a_plan(self):
+        assert set(app._FOLLOWUP_PLANS) == {
+            "meds_for_diagnosis",
+            "other_strengths",
+            "diagnosis_for_drug",
+            "loinc_unit",
+            "hcpcs_diagnosis",
+        }
+
+    def test_meds_for_diagnosis_strips_qualifiers(self):
+        plan = app._FOLLOWUP_PLANS["meds_for_diagnosis"]({"display": "Family history of leukemia"})
+
+        assert plan.search_query == plan.query == "leukemia"
+        assert plan.systems == ["RxTerms"]
+        assert plan.with_suggestions and plan.empty_message
+
+    def test_meds_for_diagnosis_keeps_last_words_of_long_display(self):
+        plan = app._FOLLOWUP_PLANS["meds_for_diagnosis"](
+            {"display": "Chronic kidney disease stage 3"}
+        )
+
+        assert plan.query == "stage 3"
+
+    def test_meds_for_diagnosis_falls_back_to_display(self):
+        plan = app._FOLLOWUP_PLANS["meds_for_diagnosis"]({"display": "Unspecified"})
+
+        assert plan.query == "Unspecified"
+
+    def test_other_strengths_uses_drug_name_or_query(self):
+        build = app._FOLLOWUP_PLANS["other_strengths"]
+
+        assert build({"display": "metformin (Oral Pill)"}).search_query == "metformin"
+        assert build({"display": "", "query": "lisinopril"}).search_query == "lisinopril"
+
+    def test_diagnosis_for_drug_shows_indication_query(self):
+        plan = app._FOLLOWUP_PLANS["diagnosis_for_drug"]({"display": "metformin (Oral Pill)"})
+
+        assert plan.search_query == "metformin"
+        assert plan.query == "metformin indication diagnosis"
+        assert plan.step_input == "metformin indication diagnosis"
+        assert plan.clarification == "diagnosis"
+
+    def test_loinc_unit_searches_units_without_actions(self):
+        plan = app._FOLLOWUP_PLANS["loinc_unit"]({"display": "Glucose", "query": "glucose"})
+
+        assert plan.search_query == "glucose unit"
+        assert plan.query == "glucose"
+        assert plan.step_input is None
+        assert not plan.remember and not plan.with_actions
+
+    def test_hcpcs_diagnosis_searches_original_query(self):
+        plan = app._FOLLOWUP_PLANS["hcpcs_diagnosis"]({"code": "A4253", "query": "test strips"})
+
+        assert plan.search_query == "test strips"
+        assert plan.heading == "**Diagnoses that pair with A4253**\n"
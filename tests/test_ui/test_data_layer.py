@@ -0,0 +1,288 @@
+# ABOUTME: Tests for the file-based Chainlit data layer.
+# ABOUTME: Covers section files, change-log replay and compaction, migration, and paging.
+
+import orjson
+import pytest
+
+from src.ui import data_layer
+from src.ui.data_layer import FileDataLayer
+
+
+def _reset_memory(monkeypatch):
+    """Drop all in-process state, as if the app had just started."""
+    monkeypatch.setattr(data_layer, "_cache", None)
+    monkeypatch.setattr(data_layer, "_signatures", {})
+    monkeypatch.setattr(data_layer, "_dirty_sections", set())
+    monkeypatch.setattr(data_layer, "_flush_task", None)
+    monkeypatch.setattr(data_layer, "_log_records", {"steps": 0, "elements": 0})
+    monkeypatch.setattr(data_layer, "_by_thread", {"steps": {}, "elements": {}})
+    monkeypatch.setattr(data_layer, "_thread_views", {})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the data layer at a temp directory with empty in-memory state."""
+    files = {name: tmp_path / f"{name}.json" for name in data_layer._SECTIONS}
+    logs = {"steps": tmp_path / "steps.jsonl", "elements": tmp_path / "elements.jsonl"}
+    monkeypatch.setattr(data_layer, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(data_layer, "SECTION_FILES", files)
+    monkeypatch.setattr(data_layer, "THREADS_FILE", files["threads"])
+    monkeypatch.setattr(data_layer, "STEPS_LOG", logs["steps"])
+    monkeypatch.setattr(data_layer, "ELEMENTS_LOG", logs["elements"])
+    monkeypatch.setattr(data_layer, "_LOGS", logs)
+    _reset_memory(monkeypatch)
+    return tmp_path
+
+
+@pytest.fixture
+def restart(monkeypatch):
+    """Simulate a process restart that keeps only what reached disk."""
+    return lambda: _reset_memory(monkeypatch)
+
+
+def _read(path):
+    return orjson.loads(path.read_bytes())
+
+
+def _step(step_id, thread_id, output=""):
+    return {"id": step_id, "threadId": thread_id, "output": output}
+
+
+class TestPersistence:
+    """Tests for flushing and reloading section files."""
+
+    async def test_close_flushes_pending_writes(self, store):
+        """close() should write debounced changes without waiting for the timer."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1", name="Diabetes", user_id="alice")
+        assert not (store / "threads.json").exists()
+
+        await layer.close()
+
+        assert _read(store / "threads.json")["t1"]["name"] == "Diabetes"
+        assert data_layer._flush_task is None
+        assert not list(store.glob("*.tmp"))
+
+    async def test_data_survives_restart(self, store, restart):
+        """Threads and their steps should reload from disk in a fresh process."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1", name="Diabetes", user_id="alice")
+        await layer.create_step(_step("s1", "t1", "E11.9"))
+        await layer.close()
+
+        restart()
+        thread = await FileDataLayer().get_thread("t1")
+
+        assert thread["name"] == "Diabetes"
+        assert [s["id"] for s in thread["steps"]] == ["s1"]
+
+    async def test_get_thread_does_not_mutate_cache(self, store):
+        """Attached steps belong to the returned copy, not the cached thread."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1", user_id="alice")
+        await layer.create_step(_step("s1", "t1"))
+
+        await layer.get_thread("t1")
+
+        assert "steps" not in data_layer._load_data()["threads"]["t1"]
+
+
+class TestChangeLog:
+    """Tests for the append-only step and element logs."""
+
+    async def test_steps_append_to_log_not_section_file(self, store):
+        """Step writes should append records instead of rewriting steps.json."""
+        layer = FileDataLayer()
+        await layer.create_step(_step("s1", "t1"))
+        await layer.update_step({"id": "s1", "output": "done"})
+
+        lines = (store / "steps.jsonl").read_bytes().splitlines()
+        assert len(lines) == 2
+        assert orjson.loads(lines[-1])["data"]["output"] == "done"
+        assert not (store / "steps.json").exists()
+
+    async def test_replay_applies_last_write_and_deletes(self, store, restart):
+        """Replaying the log should reproduce updates and deletions in order."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1", user_id="alice")
+        await layer.close()
+        await layer.create_step(_step("s1", "t1", "first"))
+        await layer.create_step(_step("s2", "t1"))
+        await layer.update_step({"id": "s1", "output": "second"})
+        await layer.delete_step("s2")
+
+        restart()
+        thread = await FileDataLayer().get_thread("t1")
+
+        assert thread["steps"] == [_step("s1", "t1", "second")]
+
+    async def test_replay_skips_torn_last_line(self, store, restart):
+        """A partial record from an interrupted append should be ignored."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1", user_id="alice")
+        await layer.close()
+        await layer.create_step(_step("s1", "t1"))
+        with open(store / "steps.jsonl", "ab") as f:
+            f.write(b'{"id":"s2","data":{"id":"s2","thr')
+
+        restart()
+        thread = await FileDataLayer().get_thread("t1")
+
+        assert [s["id"] for s in thread["steps"]] == ["s1"]
+
+    async def test_append_after_torn_line_is_not_lost(self, store, restart):
+        """The next record must not be glued onto the partial one."""
+        layer = FileDataLayer()
+        await layer.create_step(_step("s1", "t1"))
+        with open(store / "steps.jsonl", "ab") as f:
+            f.write(b'{"id":"s2","da')
+
+        restart()
+        await FileDataLayer().create_step(_step("s3", "t1"))
+        restart()
+        steps = data_layer._load_data()["steps"]
+
+        assert sorted(steps) == ["s1", "s3"]
+
+    async def test_log_compacts_into_section_file(self, store, monkeypatch):
+        """Once the log is long enough it should fold into steps.json and reset."""
+        monkeypatch.setattr(data_layer, "LOG_COMPACT_RECORDS", 3)
+        layer = FileDataLayer()
+        for i in range(3):
+            await layer.create_step(_step(f"s{i}", "t1"))
+
+        await layer.close()
+
+        assert sorted(_read(store / "steps.json")) == ["s0", "s1", "s2"]
+        assert not (store / "steps.jsonl").exists()
+        assert data_layer._log_records["steps"] == 0
+
+
+class TestLegacyMigration:
+    """Tests for splitting the pre-section combined threads.json."""
+
+    async def test_migrates_combined_file_and_pending_log(self, store):
+        """Sections should move to their own files with logged changes folded in."""
+        combined = {
+            "users": {"alice": {"id": "alice", "identifier": "alice"}},
+            "threads": {"t1": {"id": "t1", "userId": "alice", "createdAt": "2024-01-01"}},
+            "steps": {"s1": _step("s1", "t1", "old")},
+            "elements": {},
+        }
+        (store / "threads.json").write_bytes(orjson.dumps(combined))
+        (store / "steps.jsonl").write_bytes(
+            orjson.dumps({"id": "s1", "data": _step("s1", "t1", "new")}) + b"\n"
+            + orjson.dumps({"id": "s2", "data": _step("s2", "t1")}) + b"\n"
+        )
+        layer = FileDataLayer()
+
+        thread = await layer.get_thread("t1")
+        await layer.close()
+
+        assert [s["output"] for s in thread["steps"]] == ["new", ""]
+        assert list(_read(store / "threads.json")) == ["t1"]
+        assert sorted(_read(store / "steps.json")) == ["s1", "s2"]
+        assert _read(store / "steps.json")["s1"]["output"] == "new"
+        assert "alice" in _read(store / "users.json")
+        assert not (store / "steps.jsonl").exists()
+
+    async def test_split_threads_file_is_not_remigrated(self, store, restart):
+        """A threads.json that already holds only threads must load as threads."""
+        layer = FileDataLayer()
+        await layer.update_thread("users", name="Thread named like a section")
+        await layer.close()
+
+        restart()
+        thread = await FileDataLayer().get_thread("users")
+
+        assert thread["name"] == "Thread named like a section"
+
+
+class TestThreadIndex:
+    """Tests for threadId lookups and cascading deletes."""
+
+    async def test_delete_thread_cascades_to_steps_and_elements(self, store, restart):
+        """Deleting a thread should remove only its own steps and elements."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1", user_id="alice")
+        await layer.update_thread("t2", user_id="alice")
+        await layer.create_step(_step("s1", "t1"))
+        await layer.create_step(_step("s2", "t2"))
+        await layer.create_element({"id": "e1", "threadId": "t1"})
+
+        await layer.delete_thread("t1")
+        await layer.close()
+
+        assert await layer.get_thread("t1") is None
+        assert await layer.get_element("t1", "e1") is None
+        assert [s["id"] for s in (await layer.get_thread("t2"))["steps"]] == ["s2"]
+        restart()
+        assert sorted(data_layer._load_data()["steps"]) == ["s2"]
+        assert data_layer._load_data()["elements"] == {}
+
+    async def test_step_moved_between_threads(self, store):
+        """Changing a step's threadId should move it in the index."""
+        layer = FileDataLayer()
+        await layer.update_thread("t1")
+        await layer.update_thread("t2")
+        await layer.create_step(_step("s1", "t1"))
+
+        await layer.update_step({"id": "s1", "threadId": "t2"})
+
+        assert (await layer.get_thread("t1"))["steps"] == []
+        assert [s["id"] for s in (await layer.get_thread("t2"))["steps"]] == ["s1"]
+
+
+class TestListThreads:
+    """Tests for cursor pagination over the cached newest-first order."""
+
+    @pytest.fixture
+    async def layer(self, store):
+        layer = FileDataLayer()
+        for i, user in enumerate(["alice", "bob", "alice", "bob", "alice"]):
+            await layer.update_thread(f"t{i}", user_id=user)
+            data_layer._load_data()["threads"][f"t{i}"]["createdAt"] = f"2024-01-0{i + 1}"
+        data_layer._thread_views.clear()
+        return layer
+
+    async def _page(self, layer, user_id=None, cursor=None, first=2):
+        from chainlit.types import Pagination, ThreadFilter
+
+        return await layer.list_threads(
+            Pagination(first=first, cursor=cursor), ThreadFilter(userId=user_id)
+        )
+
+    async def test_pages_all_threads_newest_first(self, layer):
+        first = await self._page(layer)
+        second = await self._page(layer, cursor=first.pageInfo.endCursor)
+        last = await self._page(layer, cursor=second.pageInfo.endCursor)
+
+        ids = [t["id"] for page in (first, second, last) for t in page.data]
+        assert ids == ["t4", "t3", "t2", "t1", "t0"]
+        assert first.pageInfo.hasNextPage and second.pageInfo.hasNextPage
+        assert not last.pageInfo.hasNextPage
+
+    async def test_pages_one_user(self, layer):
+        first = await self._page(layer, user_id="alice")
+        second = await self._page(layer, user_id="alice", cursor=first.pageInfo.endCursor)
+
+        assert [t["id"] for t in first.data] == ["t4", "t2"]
+        assert [t["id"] for t in second.data] == ["t0"]
+        assert not second.pageInfo.hasNextPage
+
+    async def test_listed_threads_carry_no_steps(self, layer):
+        await layer.create_step(_step("s1", "t4"))
+
+        page = await self._page(layer)
+
+        assert page.data[0]["steps"] == []
+        assert "steps" not in data_layer._load_data()["threads"]["t4"]
+
+    async def test_new_and_reassigned_threads_invalidate_views(self, layer):
+        await self._page(layer, user_id="bob")
+
+        await layer.update_thread("t5", user_id="bob")
+        await layer.update_thread("t4", user_id="bob")
+        page = await self._page(layer, user_id="bob", first=10)
+
+        assert [t["id"] for t in page.data] == ["t5", "t4", "t3", "t1"]